@@ -1,36 +1,36 @@
+import os
+
 import pygame
 import numpy as np
 import random
-import time
 
-# Initialize Pygame
-pygame.init()
+import background_training
+import distance_fields
+import grid_renderer
+import instrument
+import policy
+import qtable_io
+import replanning
 
 # Screen Settings
 step_count = 0  # Initialize step counter here
 WIDTH, HEIGHT = 800, 450
 GRID_SIZE = 15
 CELL_SIZE = WIDTH // GRID_SIZE
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("RL Obstacle Avoidance - Enhanced")
-
-# Load Images
-bg = pygame.image.load("day_background.png")
-car_img = pygame.image.load("car.png")
-goal_img = pygame.image.load("trophy.png")
-barrier_img = pygame.image.load("barrier.png")  # Load the new barrier image
-
-# Resize images to fit grid cells
-bg = pygame.transform.scale(bg, (WIDTH, HEIGHT))
-car_img = pygame.transform.scale(car_img, (CELL_SIZE, CELL_SIZE))
-goal_img = pygame.transform.scale(goal_img, (CELL_SIZE, CELL_SIZE))
-barrier_img = pygame.transform.scale(barrier_img, (CELL_SIZE, CELL_SIZE))  # Resize barrier image
 
 # RL Settings
 ACTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # Left, Right, Up, Down
 ALPHA, GAMMA, EPSILON = 0.5, 0.9, 0.8  # Increased epsilon to encourage exploration
 TRAIN_EPISODES = 1500  # Increased for better exploration
+PLANNING_STEPS = 0  # Dyna-Q model updates per real move; with 5, about 150 TRAIN_EPISODES are enough
+TABLE_PATH = "movement_q_table.qtbl"  # Saved after training; any quantize.py export of it loads as well
 Q_table = np.zeros((GRID_SIZE, GRID_SIZE, 4))
+REPLANNER = None  # Created after training or loading a table; repairs Q_table locally when the map is edited
+TRAINER = None  # Background training process, created in main()
+POLICY = None  # Compiled greedy policy; rebuilt whenever Q_table or the map changes
+TRAINED_GOAL = None  # Goal Q_table was trained for; other goals drive from cached distance fields
+TRAINED_OBSTACLES = set()  # Map the current training run started from; edits made during it are replayed after
+FIELDS = distance_fields.FieldCache()
 
 # Game Elements
 START_POS = (1, 1)
@@ -38,142 +38,226 @@ GOAL_POS = (8, 8)
 AGENT_POS = START_POS
 OBSTACLES = set()
 
-# Pygame Font Setup
-font = pygame.font.Font(None, 40)
+# Rendering: cached static layer, dirty-rect car updates and a frame cap
+FPS = 60
+RESET_AT = None  # Tick at which a finished run returns to the start
+# Display, assets and trainer are created in main(), so a spawned training worker importing this file opens no window
+screen = clock = RENDERER = None
 
-# Function to train Q-table
+# Function to train Q-table in a background process; snapshots land in Q_table as they arrive
 def train_q_table():
-    global Q_table
-    for _ in range(TRAIN_EPISODES):
-        x, y = START_POS
-        for _ in range(100):  # Max steps per episode
-            if (x, y) == GOAL_POS:
-                break
-            
-            # Exploration vs Exploitation
-            if np.random.rand() < EPSILON:
-                action = np.random.choice(4)  # Explore randomly
-            else:
-                action = np.argmax(Q_table[x, y])  # Exploit the best-known action
-            
-            # Move based on chosen action
-            new_x, new_y = x + ACTIONS[action][0], y + ACTIONS[action][1]
-            
-            # Check if new position is valid
-            if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE and (new_x, new_y) not in OBSTACLES:
-                # Define reward
-                reward = 100 if (new_x, new_y) == GOAL_POS else -1
-                
-                # Update Q-table based on new position
-                best_next_action = np.argmax(Q_table[new_x, new_y])
-                Q_table[x, y, action] = Q_table[x, y, action] + ALPHA * (
-                    reward + GAMMA * Q_table[new_x, new_y, best_next_action] - Q_table[x, y, action]
-                )
-                x, y = new_x, new_y
+    global REPLANNER, TRAINED_GOAL, TRAINED_OBSTACLES
+    obstacles = set(OBSTACLES)
+    started = TRAINER.start(Q_table, TRAIN_EPISODES, on_finished=finish_training, on_failed=training_failed,
+                            grid_size=GRID_SIZE, obstacles=obstacles, start_pos=START_POS,
+                            goal_pos=GOAL_POS, alpha=ALPHA, gamma=GAMMA, epsilon=EPSILON,
+                            planning_steps=PLANNING_STEPS)
+    if started:
+        REPLANNER = None
+        TRAINED_GOAL = GOAL_POS
+        TRAINED_OBSTACLES = obstacles
+        print("Training Started...")
+
+# Function called once the background trainer's final snapshot is in Q_table
+def finish_training():
+    global POLICY
+    save_table()
+    # The worker trained on the map as it was when training started; replay the edits made since
+    start_replanner()
+    edits = TRAINED_OBSTACLES ^ OBSTACLES
+    for cell in edits:
+        REPLANNER.toggle_obstacle(cell)
+    if edits:
+        print(f"Re-planned {len(edits)} edits made during training with {REPLANNER.repair()} backups")
+    POLICY = None
+    pygame.display.set_caption("RL Obstacle Avoidance - Enhanced")
     print("Training Complete!")
 
+# Function called when the background trainer dies before finishing; the partial table is not saved
+def training_failed(exitcode):
+    pygame.display.set_caption("RL Obstacle Avoidance - Training failed")
+    print(f"Training failed (worker exit code {exitcode}); {TABLE_PATH} was left unchanged")
+
+# Function to start repairing Q_table on map edits, from the map and goal it was trained for.
+# A packed-policy export only marks the greedy actions, so its first repair re-solves the map.
+def start_replanner(values_known=True):
+    global REPLANNER
+    REPLANNER = replanning.IncrementalPlanner(GRID_SIZE, TRAINED_OBSTACLES, TRAINED_GOAL, GAMMA, q_table=Q_table)
+    REPLANNER.stale = not values_known
+
+# Function to save Q_table with the map and goal it was trained for
+def save_table():
+    qtable_io.save_q_table(TABLE_PATH, Q_table, env_id="grid", hyperparameters={
+        "obstacles": sorted(TRAINED_OBSTACLES), "goal": list(TRAINED_GOAL), "start": list(START_POS),
+        "alpha": ALPHA, "gamma": GAMMA, "epsilon": EPSILON, "episodes": TRAIN_EPISODES,
+    })
+
+# Function to load a saved table (float, int8 or packed-policy export) and the map it was trained on
+def load_table(path=TABLE_PATH):
+    global GOAL_POS, TRAINED_GOAL, TRAINED_OBSTACLES, POLICY
+    if not os.path.exists(path):
+        return False
+    header = qtable_io.read_header(path)
+    if tuple(header["shape"]) != Q_table.shape or "goal" not in header["hyperparameters"]:
+        return False
+    Q_table[:] = qtable_io.load_q_table(path)
+    OBSTACLES.clear()
+    OBSTACLES.update(tuple(o) for o in header["hyperparameters"]["obstacles"])
+    GOAL_POS = TRAINED_GOAL = tuple(header["hyperparameters"]["goal"])
+    TRAINED_OBSTACLES = set(OBSTACLES)
+    start_replanner(values_known=header.get("encoding") != "policy")
+    POLICY = qtable_io.load_policy(path)
+    RENDERER.rebuild(OBSTACLES, GOAL_POS)
+    print(f"Loaded {path} ({header.get('encoding', header.get('dtype'))})")
+    return True
+
+# Function to get the compiled greedy policy, compiling it after Q_table, the map or the goal changed
+def greedy_policy():
+    global POLICY
+    if POLICY is None:
+        if TRAINED_GOAL is not None and GOAL_POS != TRAINED_GOAL:
+            POLICY = FIELDS.policy(GRID_SIZE, OBSTACLES, GOAL_POS)  # Q_table points at another goal
+        else:
+            POLICY = policy.compile_grid(Q_table, OBSTACLES)
+    return POLICY
+
+# Profiled phases (TAXI_PROFILE=1); with profiling off these are the plain callables
+log = instrument.wrap("move_agent.print", print)
+
 # Function to move agent
+@instrument.timed("move_agent")
 def move_agent():
-    global AGENT_POS, step_count  # Include step_count as global
+    global AGENT_POS, step_count, RESET_AT  # Include step_count as global
+    if RESET_AT is not None:
+        return  # Goal already reached; waiting for the reset
     x, y = AGENT_POS
-    action = np.argmax(Q_table[x, y])  # Choose the best action based on the Q-table
+    action = greedy_policy().action(AGENT_POS)  # Best valid action based on the Q-table
+    if action == policy.NO_ACTION:
+        log(f"No valid moves from {AGENT_POS}!")
+        return
 
     # Debugging: Print the action and the Q-table values
-    print(f"Q-values at position {x, y}: {Q_table[x, y]}")
-    print(f"Action taken: {action} (Direction: {ACTIONS[action]})")
+    log(f"Q-values at position {x, y}: {Q_table[x, y]}")
+    log(f"Action taken: {action} (Direction: {ACTIONS[action]})")
 
     new_x, new_y = x + ACTIONS[action][0], y + ACTIONS[action][1]
     if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE and (new_x, new_y) not in OBSTACLES:
-        animate_movement(AGENT_POS, (new_x, new_y))
+        RENDERER.move_car((new_x, new_y))
         AGENT_POS = (new_x, new_y)
         
         score = 100 if AGENT_POS == GOAL_POS else -1
         step_count += 1  # Increment step counter
-        print(f"Step: {step_count}, Position: {AGENT_POS}, Score: {score}")
+        log(f"Step: {step_count}, Position: {AGENT_POS}, Score: {score}")
         
     if AGENT_POS == GOAL_POS:
-        print(f"🚗 Reached the Goal in {step_count} steps! 🏆")
-        time.sleep(1)
-        reset_grid()
+        log(f"🚗 Reached the Goal in {step_count} steps! 🏆")
+        RESET_AT = pygame.time.get_ticks() + 1000  # Show the goal for a second without blocking
         step_count = 0  # Reset step counter
 
-# Function to animate movement
-def animate_movement(start, end):
-    start_x, start_y = start[1] * CELL_SIZE, start[0] * CELL_SIZE
-    end_x, end_y = end[1] * CELL_SIZE, end[0] * CELL_SIZE
-    steps = 10
-
-    for i in range(1, steps + 1):
-        temp_x = start_x + (end_x - start_x) * (i / steps)
-        temp_y = start_y + (end_y - start_y) * (i / steps)
-        screen.blit(bg, (0, 0))
-        draw_grid()
-        screen.blit(car_img, (temp_x, temp_y))
-        pygame.display.update()
-        time.sleep(0.02)
-
 # Function to reset grid
 def reset_grid():
-    global AGENT_POS
+    global AGENT_POS, RESET_AT
     AGENT_POS = START_POS
+    RESET_AT = None
+    RENDERER.move_car(AGENT_POS, animate=False)
     print("🔄 Grid Reset! Ready for Retraining.")
 
 # Function to set a new goal
 def set_goal(pos):
-    global GOAL_POS
+    global GOAL_POS, POLICY
     x, y = pos[1] // CELL_SIZE, pos[0] // CELL_SIZE
-    if (x, y) not in OBSTACLES:
-        GOAL_POS = (x, y)
+    if y < GRID_SIZE and (x, y) not in OBSTACLES:
+        old_goal, GOAL_POS = GOAL_POS, (x, y)
+        RENDERER.update_cell(old_goal, OBSTACLES, GOAL_POS)
+        RENDERER.update_cell(GOAL_POS, OBSTACLES, GOAL_POS)
         print(f"🏆 New Goal Set at: {GOAL_POS}")
+        POLICY = None  # Switches to the cached distance field; Q_table keeps serving the trained goal
 
 # Function to toggle obstacles
 def toggle_obstacle(pos):
+    global POLICY
     x, y = pos[1] // CELL_SIZE, pos[0] // CELL_SIZE
-    if (x, y) != START_POS and (x, y) != GOAL_POS:
+    if y < GRID_SIZE and (x, y) != START_POS and (x, y) != GOAL_POS:
         if (x, y) in OBSTACLES:
             OBSTACLES.remove((x, y))
         else:
             OBSTACLES.add((x, y))
+        RENDERER.update_cell((x, y), OBSTACLES, GOAL_POS)
         print(f"Obstacles: {OBSTACLES}")
+        if REPLANNER is not None:
+            REPLANNER.toggle_obstacle((x, y))
+            print(f"Re-planned with {REPLANNER.repair()} backups")
+        POLICY = None
+
+# Function to open the window, load the assets and the saved table, and run the main loop
+def main():
+    global screen, clock, RENDERER, TRAINER, POLICY
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("RL Obstacle Avoidance - Enhanced")
+
+    # Load Images
+    bg = pygame.image.load("day_background.png")
+    car_img = pygame.image.load("car.png")
+    goal_img = pygame.image.load("trophy.png")
+    barrier_img = pygame.image.load("barrier.png")  # Load the new barrier image
+
+    # Resize images to fit grid cells
+    bg = pygame.transform.scale(bg, (WIDTH, HEIGHT))
+    car_img = pygame.transform.scale(car_img, (CELL_SIZE, CELL_SIZE))
+    goal_img = pygame.transform.scale(goal_img, (CELL_SIZE, CELL_SIZE))
+    barrier_img = pygame.transform.scale(barrier_img, (CELL_SIZE, CELL_SIZE))  # Resize barrier image
+
+    # Pygame Font Setup
+    font = pygame.font.Font(None, 40)
+    clock = pygame.time.Clock()
+    instructions = [
+        (font.render("'T': Train | 'M': Move | 'R': Reset", True, (255, 255, 255)), (50, HEIGHT - 80)),
+        (font.render("L-Click: Obstacle | R-Click: Goal", True, (255, 255, 255)), (50, HEIGHT - 40)),
+    ]
+    RENDERER = grid_renderer.GridRenderer(screen, bg, car_img, goal_img, barrier_img, CELL_SIZE, instructions)
+    RENDERER.rebuild(OBSTACLES, GOAL_POS)
+    RENDERER.move_car(AGENT_POS, animate=False)
+    TRAINER = background_training.BackgroundTrainer(Q_table.shape)
+
+    # Profiled phases (TAXI_PROFILE=1)
+    poll_trainer = instrument.wrap("trainer.poll", TRAINER.poll)
+    render = instrument.wrap("render", RENDERER.render)
+    wait_frame = instrument.wrap("frame.wait", clock.tick)
 
-# Function to draw grid and UI
-def draw_grid():
-    screen.blit(bg, (0, 0))
+    load_table()
+    running = True
+    while running:
+        # Pick up the latest Q-table snapshot from the background trainer
+        if poll_trainer(Q_table):
+            POLICY = None
+            if TRAINER.running:
+                pygame.display.set_caption(f"RL Obstacle Avoidance - Training {TRAINER.progress():.0%}")
+        if RESET_AT is not None and pygame.time.get_ticks() >= RESET_AT:
+            reset_grid()
 
-    # Draw obstacles using the barrier image
-    for obs in OBSTACLES:
-        screen.blit(barrier_img, (obs[1] * CELL_SIZE, obs[0] * CELL_SIZE))
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_t:
+                    train_q_table()
+                if event.key == pygame.K_m:
+                    move_agent()
+                if event.key == pygame.K_r:
+                    reset_grid()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:
+                    toggle_obstacle(pygame.mouse.get_pos())
+                elif event.button == 3:
+                    set_goal(pygame.mouse.get_pos())
 
-    screen.blit(goal_img, (GOAL_POS[1] * CELL_SIZE, GOAL_POS[0] * CELL_SIZE))
-    screen.blit(car_img, (AGENT_POS[1] * CELL_SIZE, AGENT_POS[0] * CELL_SIZE))
+        render()
+        wait_frame(FPS)
 
-    # Instructions
-    text1 = font.render("'T': Train | 'M': Move | 'R': Reset", True, (255, 255, 255))
-    text2 = font.render("L-Click: Obstacle | R-Click: Goal", True, (255, 255, 255))
-    screen.blit(text1, (50, HEIGHT - 80))
-    screen.blit(text2, (50, HEIGHT - 40))
+    TRAINER.stop()
+    pygame.quit()
 
 # Main Loop
-running = True
-while running:
-    screen.fill((255, 255, 255))
-    draw_grid()
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_t:
-                train_q_table()
-            if event.key == pygame.K_m:
-                move_agent()
-            if event.key == pygame.K_r:
-                reset_grid()
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                toggle_obstacle(pygame.mouse.get_pos())
-            elif event.button == 3:
-                set_goal(pygame.mouse.get_pos())
-
-    pygame.display.update()
-
-pygame.quit()
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,136 @@
-import gymnasium as gym
-import numpy as np
-import random
-import json
-import matplotlib.pyplot as plt
-
-# Initialize environment with graphical rendering
-env = gym.make('Taxi-v3', render_mode="rgb_array")
-
-# Creating Q-Table
-actions = env.action_space.n
-state_space = env.observation_space.n
-q_table = np.zeros((state_space, actions))
-
-# Parameters for Q-Learning
-num_episodes = 10000
-max_steps_per_episode = 100
-learning_rate = 0.1
-discount_rate = 0.99
-exploration_rate = 1
-max_exploration_rate = 1
-min_exploration_rate = 0.01
-exploration_decay_rate = 0.001  
-
-rewards_all_episodes = []
-
-def train_agent():
-    global exploration_rate  
-    for episode in range(num_episodes):
-        state, _ = env.reset()  
-        state = int(state)  
-
-        done = False
-        total_reward = 0
-
-        for step in range(max_steps_per_episode):
-            if random.uniform(0, 1) > exploration_rate:
-                action = np.argmax(q_table[state, :])  
-            else:
-                action = env.action_space.sample()  
-
-            new_state, reward, done, truncated, _ = env.step(action)
-            new_state = int(new_state)  
-
-            # Update Q-Table using Bellman Equation
-            q_table[state, action] = q_table[state, action] * (1 - learning_rate) + \
-                                     learning_rate * (reward + discount_rate * np.max(q_table[new_state, :]))
-
-            state = new_state
-            total_reward += reward
-
-            if done or truncated:
-                break
-
-        # Decay exploration rate
-        exploration_rate = min_exploration_rate + (max_exploration_rate - min_exploration_rate) * np.exp(-exploration_decay_rate * episode)
-        
-        rewards_all_episodes.append(total_reward)
-
-        # Show training progress every 1000 episodes
-        if episode % 1000 == 0:
-            print(f"\nEpisode {episode}: Total Reward = {total_reward}")
-
-    # Save Q-table
-    with open("q_table.json", "w") as f:
-        json.dump(q_table.tolist(), f)
-
-print("Training Started")
-train_agent()
-print("Training Finished")
-
-# Save final Q-table
-np.save("q_table.npy", q_table)
-
-
-# Function to Display the Environment for a Fixed Duration
-def display_env():
-    img = env.render()  # Get RGB array of the environment
-    plt.imshow(img)
-    plt.axis('off')
-    plt.draw()   # Draw the figure
-    plt.pause(2)  # Display the image for 10 seconds
-    plt.close()   # Close the figure automatically
-
-
-# Test the trained agent
-def test_agent(num_episodes=5):
-    for episode in range(num_episodes):
-        state, _ = env.reset()  
-        state = int(state)
-
-        done = False
-        step_count = 0
-        total_reward = 0
-
-        print(f"\nEpisode {episode + 1}")
-        
-        while not done:
-            action = np.argmax(q_table[state, :])  # Take best action
-            new_state, reward, done, truncated, _ = env.step(action)
-            state = new_state
-            total_reward += reward
-            step_count += 1
-
-            # Display graphical state
-            display_env()  
-
-            if done or truncated:
-                break
-
-        print(f"Episode {episode + 1} finished in {step_count} steps with total reward: {total_reward}")
-
-print("\nRunning Trained Agent")
-test_agent()
+import gymnasium as gym
+import numpy as np
+
+import evaluation
+import policy
+import qtable_io
+import taxi_training
+
+# Environment and Q-table are created in main(), so importing this file neither trains nor opens anything
+env = q_table = None
+
+# Parameters for Q-Learning
+num_episodes = 10000
+max_steps_per_episode = 100
+learning_rate = 0.1
+discount_rate = 0.99
+max_exploration_rate = 1
+min_exploration_rate = 0.01
+exploration_decay_rate = 0.001  
+
+# One seed drives every random draw; coins and actions are pre-drawn in blocks
+seed = 42
+
+# Dyna-Q mode: every real step also replays planning_steps remembered transitions from a learned
+# model (0 = plain Q-learning). With planning on, training stops once the greedy policy delivers
+# from every start state, which takes about a tenth of the real environment steps.
+planning_steps = 0
+prioritized_sweeping = True
+
+# Experience replay mode: transitions go to a ring buffer, and every replay_every steps the Q-table
+# learns from a minibatch of replay_batch of them in one array update (0 = the scalar update)
+replay_batch = 0
+replay_every = 4
+prioritized_replay = False
+
+# Checkpoints go to checkpoints/taxi_gui, and running the script again after an interruption resumes
+# from the newest; episode stats stream to telemetry/taxi_gui
+# (watch live with: python telemetry.py plot telemetry/taxi_gui)
+run_name = "taxi_gui"
+
+# Function to show training progress every 1000 episodes
+def show_progress(episode, total_reward, stream):
+    if episode % 1000 == 0:
+        recent = stream.recent(1000)
+        print(f"\nEpisode {episode}: Total Reward = {total_reward}, "
+              f"mean of last {len(recent['reward'])} = {recent['reward'].mean():.2f}")
+
+# Function to save Q-table in the binary, memory-mappable format once training ends
+def save_table(result):
+    qtable_io.save_q_table(qtable_io.DEFAULT_PATH, q_table, env_id="Taxi-v3", training_steps=result["training_steps"],
+                           hyperparameters={
+                               "learning_rate": learning_rate,
+                               "discount_rate": discount_rate,
+                               "exploration_decay_rate": exploration_decay_rate,
+                               "num_episodes": num_episodes,
+                               "planning_steps": planning_steps,
+                               "replay_batch": replay_batch,
+                           })
+
+# Function to train q_table with the settings above
+def train_agent():
+    result = taxi_training.run_taxi_training(
+        env, q_table, run_name, num_episodes=num_episodes, max_steps_per_episode=max_steps_per_episode,
+        learning_rate=learning_rate, discount_rate=discount_rate, max_exploration_rate=max_exploration_rate,
+        min_exploration_rate=min_exploration_rate, exploration_decay_rate=exploration_decay_rate, seed=seed,
+        planning_steps=planning_steps, prioritized_sweeping=prioritized_sweeping, replay_batch=replay_batch,
+        replay_every=replay_every, prioritized_replay=prioritized_replay, on_episode=show_progress,
+        on_finished=save_table)
+    if result["solved"]:
+        print(f"\nSolved after {result['episodes']} episodes, {result['training_steps']} real steps")
+
+
+# Function to Display the Environment for a Fixed Duration
+def display_env():
+    import matplotlib.pyplot as plt  # Only needed when rendering is requested
+    img = env.render()  # Get RGB array of the environment
+    plt.imshow(img)
+    plt.axis('off')
+    plt.draw()   # Draw the figure
+    plt.pause(2)  # Display the image for 10 seconds
+    plt.close()   # Close the figure automatically
+
+
+# Test the trained agent: a headless audit of every start state, or rendered episodes on request
+def test_agent(num_episodes=5, render=False):
+    if not render:
+        evaluation.print_report(evaluation.evaluate_taxi(q_table), "Greedy policy over all start states")
+        return
+
+    greedy = policy.compile_taxi(q_table)
+    for episode in range(num_episodes):
+        state, _ = env.reset()  
+        state = int(state)
+
+        done = False
+        step_count = 0
+        total_reward = 0
+
+        print(f"\nEpisode {episode + 1}")
+        
+        while not done:
+            action = greedy.action(int(state))  # Take best action
+            new_state, reward, done, truncated, _ = env.step(action)
+            state = new_state
+            total_reward += reward
+            step_count += 1
+
+            # Display graphical state
+            display_env()  
+
+            if done or truncated:
+                break
+
+        print(f"Episode {episode + 1} finished in {step_count} steps with total reward: {total_reward}")
+
+# Function to create the environment, train the agent and audit it
+def main():
+    global env, q_table
+    # Initialize environment with graphical rendering
+    env = gym.make('Taxi-v3', render_mode="rgb_array")
+
+    # Creating Q-Table
+    actions = env.action_space.n
+    state_space = env.observation_space.n
+    q_table = np.zeros((state_space, actions))
+
+    print("Training Started")
+    train_agent()
+    print("Training Finished")
+
+    print("\nRunning Trained Agent")
+    test_agent()
+
+if __name__ == "__main__":
+    main()
+
@@ -1,99 +1,102 @@
 import gym
 import numpy as np
-import random
 import time
 from IPython.display import clear_output
 
-# Initialize environment
-env = gym.make('Taxi-v3', render_mode="ansi")  # Text-based rendering
-
-# Creating Q-Table
-actions = env.action_space.n
-state_space = env.observation_space.n
-q_table = np.zeros((state_space, actions))
+import policy
+import taxi_training
+import telemetry
 
 # Parameters for Q-Learning
 num_episodes = 10000
 max_steps_per_episode = 100
 learning_rate = 0.1
 discount_rate = 0.99
-exploration_rate = 1
 max_exploration_rate = 1
 min_exploration_rate = 0.01
 exploration_decay_rate = 0.001  # Adjusted decay rate
 
-rewards_all_episodes = []
-
-# Q-Learning Algorithm
-for episode in range(num_episodes):
-    state = env.reset()[0]  # Extract state from the tuple
-    state = int(state)  # Ensure state is an integer
-    done = False
-    total_reward = 0
-
-    for step in range(max_steps_per_episode):
-        # Exploration vs Exploitation trade-off
-        if random.uniform(0, 1) > exploration_rate:
-            action = np.argmax(q_table[state, :])  # Exploitation
-        else:
-            action = env.action_space.sample()  # Exploration
-
-        new_state, reward, done, truncated, _ = env.step(action)
-        new_state = int(new_state)  # Ensure new_state is an integer
-
-        # Update Q-Table using the Bellman Equation
-        q_table[state, action] = q_table[state, action] * (1 - learning_rate) + \
-                                 learning_rate * (reward + discount_rate * np.max(q_table[new_state, :]))
-
-        state = new_state
-        total_reward += reward
-
-        if done or truncated:
-            break
-
-    # Decay the exploration rate using exponential decay
-    exploration_rate = min_exploration_rate + (max_exploration_rate - min_exploration_rate) * np.exp(-exploration_decay_rate * episode)
-
-    rewards_all_episodes.append(total_reward)
-
-print("***** Training Finished *****")
-
-# Calculate and print average reward per thousand episodes
-rewards_per_thousand_episodes = np.split(np.array(rewards_all_episodes), num_episodes / 1000)
-count = 1000
-
-print("Average per thousand episodes:")
-for r in rewards_per_thousand_episodes:
-    print(count, ":", str(sum(r) / 1000))
-    count += 1000
-
-# Visualizing the agent's performance
-for episode in range(3):
-    state = env.reset()[0]  # Extract state
-    state = int(state)
-    done = False
-    print("Episode:", episode + 1)
-    time.sleep(1)
+# One seed drives every random draw; coins and actions are pre-drawn in blocks
+seed = 42
+
+# Dyna-Q mode: every real step also replays planning_steps remembered transitions from a learned
+# model (0 = plain Q-learning); prioritized sweeping replays the largest TD errors first
+planning_steps = 0
+prioritized_sweeping = True
+
+# Experience replay mode: transitions go to a ring buffer, and every replay_every steps the Q-table
+# learns from a minibatch of replay_batch of them in one array update (0 = the scalar update)
+replay_batch = 0
+replay_every = 4
+prioritized_replay = False
+
+# Checkpoints go to checkpoints/taxi_basic, and running the script again after an interruption resumes
+# from the newest; episode stats stream to telemetry/taxi_basic
+# (watch live with: python telemetry.py plot telemetry/taxi_basic)
+run_name = "taxi_basic"
+
+# Function to train, report the learning curve and show a few greedy episodes
+def main():
+    # Initialize environment
+    env = gym.make('Taxi-v3', render_mode="ansi")  # Text-based rendering
+
+    # Creating Q-Table
+    actions = env.action_space.n
+    state_space = env.observation_space.n
+    q_table = np.zeros((state_space, actions))
+
+    # Q-Learning Algorithm
+    result = taxi_training.run_taxi_training(
+        env, q_table, run_name, num_episodes=num_episodes, max_steps_per_episode=max_steps_per_episode,
+        learning_rate=learning_rate, discount_rate=discount_rate, max_exploration_rate=max_exploration_rate,
+        min_exploration_rate=min_exploration_rate, exploration_decay_rate=exploration_decay_rate, seed=seed,
+        planning_steps=planning_steps, prioritized_sweeping=prioritized_sweeping, replay_batch=replay_batch,
+        replay_every=replay_every, prioritized_replay=prioritized_replay)
+    if result["solved"]:
+        print(f"Solved after {result['episodes']} episodes")
+    print("***** Training Finished *****")
+
+    # Calculate and print average reward per thousand episodes from the telemetry file
+    rewards_per_thousand_episodes = telemetry.block_means(telemetry.load(result["telemetry_path"])["reward"], 1000)
+    count = 1000
+
+    print("Average per thousand episodes:")
+    for r in rewards_per_thousand_episodes:
+        print(count, ":", str(r))
+        count += 1000
+
+    # Visualizing the agent's performance
+    greedy = policy.compile_taxi(q_table)
+    for episode in range(3):
+        state = env.reset()[0]  # Extract state
+        state = int(state)
+        done = False
+        print("Episode:", episode + 1)
+        time.sleep(1)
+
+        for step in range(max_steps_per_episode):
+            clear_output(wait=True)
+            print(env.render())  # Fixed rendering issue
+            time.sleep(0.3)
 
-    for step in range(max_steps_per_episode):
-        clear_output(wait=True)
-        print(env.render())  # Fixed rendering issue
-        time.sleep(0.3)
+            action = greedy.action(state)  # Choose best action
+            new_state, reward, done, truncated, _ = env.step(action)
+            new_state = int(new_state)
 
-        action = np.argmax(q_table[state, :])  # Choose best action
-        new_state, reward, done, truncated, _ = env.step(action)
-        new_state = int(new_state)
+            if done or truncated:
+                clear_output(wait=True)
+                print(env.render())  # Fixed rendering issue
+                if reward == 20:  # Success case
+                    print("**** Reached Goal ****")
+                else:
+                    print("**** Failed ****")
+                time.sleep(2)
+                break
 
-        if done or truncated:
-            clear_output(wait=True)
-            print(env.render())  # Fixed rendering issue
-            if reward == 20:  # Success case
-                print("**** Reached Goal ****")
-            else:
-                print("**** Failed ****")
-            time.sleep(2)
-            break
+            state = new_state
 
-        state = new_state
+    env.close()
 
-env.close()
+# Training runs only when the script is started, never on import
+if __name__ == "__main__":
+    main()
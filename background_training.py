@@ -0,0 +1,171 @@
+"""Grid training in a background worker process.
+
+The worker trains in chunks of episodes with grid_trainer and publishes
+each Q-table snapshot into a shared-memory array, bumping a version
+counter and an episode counter. The UI calls poll() once per frame to copy
+in the newest snapshot, so it never blocks on training.
+"""
+import multiprocessing as mp
+
+import numpy as np
+
+import block_rng
+import checkpoint
+import dyna
+import grid_trainer
+import grid_world
+
+
+# Function to describe the map and settings a run trains with (obstacles as an occupancy mask)
+def _run_settings(shape, train_kwargs, planning_steps, prioritized_sweeping):
+    settings = {"shape": list(shape), "planning_steps": planning_steps, "prioritized_sweeping": prioritized_sweeping}
+    for name, value in train_kwargs.items():
+        if name == "obstacles" and not isinstance(value, np.ndarray):
+            value = grid_world.obstacle_mask(shape[0], value)
+        settings[name] = np.asarray(value).tolist() if isinstance(value, tuple) else value  # As JSON reads it back
+    return settings
+
+
+# Function to compare run settings, one of them read back from a checkpoint
+def _same_settings(saved, current):
+    if isinstance(saved, dict) and isinstance(current, dict):
+        return saved.keys() == current.keys() and all(_same_settings(saved[name], current[name]) for name in saved)
+    if isinstance(saved, np.ndarray) or isinstance(current, np.ndarray):
+        return np.array_equal(saved, current)
+    return saved == current
+
+
+# Function run in the worker process: train in chunks and publish each snapshot
+def _train_worker(shared, shape, lock, version, progress, episodes, chunk_episodes, train_kwargs):
+    snapshot = np.frombuffer(shared, dtype=np.float64).reshape(shape)
+    with lock:
+        q_table = snapshot.copy()
+
+    # One RNG stream across all chunks, so a seeded run is reproducible
+    rng = block_rng.BlockRNG(train_kwargs.pop("seed", None), grid_world.NUM_ACTIONS)
+    done = 0
+
+    # A Dyna-Q model has to outlive each chunk, so the worker owns the planner
+    planning_steps = train_kwargs.pop("planning_steps", 0)
+    prioritized_sweeping = train_kwargs.pop("prioritized_sweeping", False)
+    planner = None
+    if planning_steps:
+        planner = dyna.DynaPlanner(q_table, planning_steps, train_kwargs.get("alpha", 0.5),
+                                   train_kwargs.get("gamma", 0.9), prioritized=prioritized_sweeping,
+                                   generator=rng.generator)
+
+    # Optional crash safety: checkpoints between chunks (at most one per checkpoint_interval seconds),
+    # and resume=True continues the newest one if it was written for the same map and settings
+    checkpoint_dir = train_kwargs.pop("checkpoint_dir", None)
+    checkpoint_interval = train_kwargs.pop("checkpoint_interval", 5.0)
+    resume = train_kwargs.pop("resume", False)
+    settings = _run_settings(shape, train_kwargs, planning_steps, prioritized_sweeping)
+    resume_path = checkpoint.latest(checkpoint_dir) if checkpoint_dir and resume else None
+    if resume_path:
+        state = checkpoint.load(resume_path)
+        if not _same_settings(state.get("settings"), settings):
+            raise ValueError(f"{resume_path} was written for another map or other training settings; "
+                             f"resume with the same ones, or delete {checkpoint_dir} to start over")
+        q_table[:] = state["q_table"]
+        rng.set_state(state["rng"])
+        done = state["episodes"]
+        if planner is not None:
+            planner.set_state(state["planner"])
+    checkpoints = checkpoint.Checkpointer(checkpoint_dir, checkpoint_interval) if checkpoint_dir else None
+
+    while done < episodes:
+        count = min(chunk_episodes, episodes - done)
+        q_table = grid_trainer.train_q_table(episodes=count, q_table=q_table, rng=rng, planner=planner, **train_kwargs)
+        done += count
+        with lock:
+            snapshot[:] = q_table
+            version.value += 1
+            progress.value = done
+        if checkpoints is not None and checkpoints.due():
+            checkpoints.save(done, {"episodes": done, "q_table": q_table, "rng": rng.get_state(),
+                                    "planner": planner.get_state() if planner is not None else None,
+                                    "settings": settings})
+
+    if checkpoints is not None:
+        checkpoints.close()
+        checkpoints.clear()  # The final snapshot is published; nothing left to resume
+
+
+class BackgroundTrainer:
+    """Trains a grid Q-table in another process and hands back snapshots."""
+
+    def __init__(self, shape, chunk_episodes=100):
+        self.shape = tuple(shape)
+        self.chunk_episodes = chunk_episodes
+        self._shared = mp.RawArray("d", int(np.prod(self.shape)))
+        self._snapshot = np.frombuffer(self._shared, dtype=np.float64).reshape(self.shape)
+        self._lock = mp.Lock()
+        self._version = mp.RawValue("l", 0)
+        self._progress = mp.RawValue("l", 0)
+        self._seen = 0
+        self.episodes = 0
+        self.process = None
+        self.exitcode = None  # Exit code of the last worker; nonzero when it crashed or was killed
+        self.on_finished = None
+        self.on_failed = None
+
+    @property
+    def running(self):
+        return self.process is not None
+
+    # Fraction of the requested episodes the worker has finished
+    def progress(self):
+        return self._progress.value / self.episodes if self.episodes else 0.0
+
+    # Function to start training from q_table; returns False if a run is already going.
+    # on_finished() runs once the final snapshot is in; on_failed(exitcode) if the worker dies first
+    def start(self, q_table, episodes, on_finished=None, on_failed=None, **train_kwargs):
+        if self.running:
+            return False
+        with self._lock:
+            self._snapshot[:] = q_table
+            self._version.value = 0
+            self._progress.value = 0
+        self._seen = 0
+        self.episodes = episodes
+        self.exitcode = None
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        self.process = mp.Process(
+            target=_train_worker,
+            args=(self._shared, self.shape, self._lock, self._version, self._progress,
+                  episodes, self.chunk_episodes, train_kwargs),
+            daemon=True,
+        )
+        self.process.start()
+        return True
+
+    # Function to copy the newest snapshot into q_table; returns True if it changed
+    def poll(self, q_table):
+        if not self.running:
+            return False
+        # Check liveness first so a finished worker's last snapshot is already published
+        alive = self.process.is_alive()
+        updated = False
+        if self._version.value != self._seen:
+            with self._lock:
+                q_table[:] = self._snapshot
+                self._seen = self._version.value
+            updated = True
+        if not alive:
+            self.process.join()
+            self.exitcode = self.process.exitcode
+            self.process = None
+            # A crashed worker's last snapshot is partial, so only a clean exit counts as finished
+            if self.exitcode == 0 and self.on_finished is not None:
+                self.on_finished()
+            elif self.exitcode != 0 and self.on_failed is not None:
+                self.on_failed(self.exitcode)
+        return updated
+
+    # Function to stop a running worker without publishing further snapshots
+    def stop(self):
+        if self.running:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
@@ -0,0 +1,245 @@
+"""Benchmark suite for training throughput, inference latency and convergence.
+
+Measures environment steps/s and episodes/s (gymnasium Taxi-v3 path,
+vectorized engine and the grid trainers across grid sizes), compiled-policy
+greedy action latency, Q-table load time, peak memory, and wall-clock time
+to a target average reward. Results are compared against a JSON baseline
+with per-metric regression tolerances.
+
+    python benchmark.py                  # run and compare with benchmark_baseline.json
+    python benchmark.py --save-baseline  # run and record a new baseline
+    python benchmark.py --runs 3         # median of three full runs
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import block_rng
+import grid_trainer
+import policy
+import qtable_io
+import sweep
+import taxi_vec_env
+
+BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.25  # Allowed relative slowdown before a metric counts as a regression; the baseline
+# file's "tolerances" widen it for sub-microsecond latencies and load times, which swing more than that
+REPEATS = 5  # Timings keep the best of this many runs to damp scheduler noise
+LOAD_CALLS = 200  # Loads per timed run; a single open takes tens of microseconds, too short to time alone
+GRID_SIZES = [15, 50, 100]
+
+
+def _result(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+# Function to time fn() REPEATS times; returns (best seconds, result of the last run)
+def _timed(fn, *args, **kwargs):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+# Function to measure the peak traced allocation of fn(), in MiB (timed runs stay untraced)
+def _peak_memory(fn, *args, **kwargs):
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+# Function to run the scripts' scalar Q-learning loop (as in train_agent) on a gymnasium env
+def _scalar_q_learning(env, num_episodes, max_steps=100, learning_rate=0.1, discount_rate=0.99):
+    q_table = np.zeros((env.observation_space.n, env.action_space.n))
+    rng = block_rng.BlockRNG(0, env.action_space.n)
+    steps = 0
+    for episode in range(num_episodes):
+        state = int(env.reset()[0])
+        exploration_rate = 0.01 + 0.99 * np.exp(-0.001 * episode)
+        for _ in range(max_steps):
+            if rng.coin() > exploration_rate:
+                action = np.argmax(q_table[state, :])
+            else:
+                action = rng.action()
+            new_state, reward, done, truncated, _ = env.step(action)
+            q_table[state, action] = q_table[state, action] * (1 - learning_rate) + \
+                learning_rate * (reward + discount_rate * np.max(q_table[new_state, :]))
+            state = new_state
+            steps += 1
+            if done or truncated:
+                break
+    return steps
+
+
+def bench_gym_taxi(results, episodes=100):
+    import gymnasium as gym
+    env = gym.make("Taxi-v3")
+    env.reset(seed=0)
+    seconds, steps = _timed(_scalar_q_learning, env, episodes)
+    results["gym_taxi.steps_per_sec"] = _result(steps / seconds, "steps/s", True)
+    results["gym_taxi.episodes_per_sec"] = _result(episodes / seconds, "episodes/s", True)
+    env.close()
+
+
+def bench_vec_taxi(results, num_envs=1024, num_steps=200, episodes=10000):
+    env = taxi_vec_env.VecTaxiEnv(num_envs, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).integers(taxi_vec_env.NUM_ACTIONS, size=(num_steps, num_envs))
+
+    def run_steps():
+        for step_actions in actions:
+            env.step(step_actions)
+
+    seconds, _ = _timed(run_steps)
+    results["vec_taxi.steps_per_sec"] = _result(num_steps * num_envs / seconds, "steps/s", True)
+
+    seconds, (_, rewards) = _timed(taxi_vec_env.train_q_learning, num_episodes=episodes, seed=0)
+    results["vec_taxi.train_episodes_per_sec"] = _result(episodes / seconds, "episodes/s", True)
+    peak = _peak_memory(taxi_vec_env.train_q_learning, num_episodes=episodes // 10, seed=0)
+    results["vec_taxi.train_peak_memory"] = _result(peak, "MiB", False)
+    return seconds, rewards
+
+
+# Wall time to the target is the run time scaled by the episode where the moving average first reaches it
+def bench_convergence(results, seconds, rewards, target=7.0):
+    episode = sweep.time_to_threshold(rewards, target)
+    value = seconds * episode / len(rewards) if episode is not None else float("inf")
+    results["vec_taxi.seconds_to_target_reward"] = _result(value, "s", False)
+
+
+def bench_grid_trainers(results, episodes=1000):
+    for size in GRID_SIZES:
+        rng = np.random.default_rng(size)
+        obstacles = {tuple(cell) for cell in rng.integers(size, size=(size * size // 10, 2))}
+        obstacles -= {(0, 0), (size - 1, size - 1)}
+        args = (size, obstacles, (0, 0), (size - 1, size - 1))
+        seconds, _ = _timed(grid_trainer.train_q_table, *args, episodes=episodes, max_steps=4 * size, seed=0)
+        results[f"grid{size}.train_episodes_per_sec"] = _result(episodes / seconds, "episodes/s", True)
+        peak = _peak_memory(grid_trainer.train_q_table, *args, episodes=episodes // 10, max_steps=4 * size, seed=0)
+        results[f"grid{size}.train_peak_memory"] = _result(peak, "MiB", False)
+
+
+# Greedy actions are served the way the GUIs and policy_server.py serve them: from a compiled policy
+def bench_inference(results, calls=20000):
+    q_table = np.random.default_rng(0).random((taxi_vec_env.NUM_STATES, taxi_vec_env.NUM_ACTIONS))
+    states = np.random.default_rng(1).integers(taxi_vec_env.NUM_STATES, size=calls).tolist()
+    taxi_policy = policy.compile_taxi(q_table)
+
+    def taxi_actions():
+        for state in states:
+            taxi_policy.action(state)
+
+    seconds, _ = _timed(taxi_actions)
+    results["taxi.greedy_action_latency"] = _result(seconds / calls * 1e6, "us", False)
+
+    grid = np.random.default_rng(2).random((100, 100, 4))
+    blocked = np.random.default_rng(4).random((100, 100)) < 0.1
+    grid_policy = policy.compile_grid(grid, blocked)  # Masks moves into obstacles or off the grid
+    cells = [tuple(cell) for cell in np.random.default_rng(3).integers(100, size=(calls, 2)).tolist()]
+
+    def grid_actions():
+        for cell in cells:
+            grid_policy.action(cell)
+
+    seconds, _ = _timed(grid_actions)
+    results["grid.greedy_action_latency"] = _result(seconds / calls * 1e6, "us", False)
+
+
+def bench_load(results):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, shape in [("taxi", (500, 6)), ("grid1000", (1000, 1000, 4))]:
+            path = os.path.join(tmp, f"{name}.qtbl")
+            qtable_io.save_q_table(path, np.zeros(shape))
+
+            def load_many():
+                for _ in range(LOAD_CALLS):
+                    qtable_io.load_q_table(path)
+
+            seconds, _ = _timed(load_many)
+            results[f"{name}.qtable_load_time"] = _result(seconds / LOAD_CALLS * 1e3, "ms", False)
+
+
+# Function to run every benchmark; returns {metric: {value, unit, higher_is_better}}
+def run_all(include_gym=True):
+    results = {}
+    if include_gym:
+        bench_gym_taxi(results)
+    seconds, rewards = bench_vec_taxi(results)
+    bench_convergence(results, seconds, rewards)
+    bench_grid_trainers(results)
+    bench_inference(results)
+    bench_load(results)
+    return results
+
+
+# Function to run the suite several times and keep each metric's median
+def run_median(runs, include_gym=True):
+    all_results = [run_all(include_gym) for _ in range(runs)]
+    results = all_results[0]
+    for name, r in results.items():
+        r["value"] = float(np.median([run[name]["value"] for run in all_results]))
+    return results
+
+
+# Function to list metrics that regressed beyond their tolerance relative to the baseline
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    regressions = []
+    for name, base in baseline.get("metrics", {}).items():
+        if name not in results:
+            continue
+        allowed = baseline.get("tolerances", {}).get(name, tolerance)
+        value, expected = results[name]["value"], base["value"]
+        if base["higher_is_better"]:
+            regressed = value < expected * (1 - allowed)
+        else:
+            regressed = value > expected * (1 + allowed)
+        if regressed:
+            regressions.append((name, expected, value, base["unit"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--runs", type=int, default=1, help="full suite runs; metrics keep the median")
+    parser.add_argument("--no-gym", action="store_true", help="skip the gymnasium Taxi-v3 path")
+    args = parser.parse_args(argv)
+
+    results = run_median(args.runs, include_gym=not args.no_gym)
+    for name, r in sorted(results.items()):
+        print(f"{name:40s} {r['value']:14.3f} {r['unit']}")
+
+    if args.save_baseline:
+        tolerances = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                tolerances = json.load(f).get("tolerances", {})
+        with open(args.baseline, "w") as f:
+            json.dump({"metrics": results, "tolerances": tolerances}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for name, expected, value, unit in regressions:
+        print(f"REGRESSION {name}: {value:.3f} {unit} (baseline {expected:.3f} {unit})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Block-drawn random numbers for the Q-learning loops.
+
+One seed feeds everything: a numpy SeedSequence is split into an epsilon
+coin stream, a random action stream and a general-purpose Generator.
+For the scalar loops, coins and actions are pre-drawn in large blocks, so
+a training step reads a list element instead of calling into an RNG; the
+batched trainers draw exactly the vectors they need. Both streams come from
+uniform doubles, so the values a run sees do not depend on how they are
+consumed (one at a time, or as vectors for the batched trainers), and
+spawn() hands out independent per-worker streams from a single seed.
+"""
+import numpy as np
+
+
+class _Stream:
+    """A pre-drawn block of values served one at a time or as arrays."""
+
+    def __init__(self, draw, block_size):
+        self._draw = draw
+        self.block_size = block_size
+        self._array = self._draw(0)
+        self._list = None  # Python copy of the block for next(), built only once a scalar loop reads it
+        self._pos = 0
+
+    def get_state(self):
+        return {"block": self._array.copy(), "pos": self._pos}
+
+    def set_state(self, state):
+        self._array = np.array(state["block"])
+        self._list = None
+        self._pos = int(state["pos"])
+
+    def _refill(self):
+        self._array = self._draw(self.block_size)
+        self._list = None
+        self._pos = 0
+
+    def next(self):
+        if self._pos >= len(self._array):
+            self._refill()
+        if self._list is None:
+            self._list = self._array.tolist()
+        value = self._list[self._pos]
+        self._pos += 1
+        return value
+
+    def take(self, n):
+        out = self._array[self._pos:self._pos + n]
+        self._pos += len(out)
+        if len(out) == n:
+            return out
+        # The generators give the same values whatever the draw sizes, so the rest is drawn directly
+        # instead of through full blocks, and batched trainers only ever hold n values
+        return np.concatenate([out, self._draw(n - len(out))])
+
+
+class BlockRNG:
+    """Epsilon coins and random actions from one seed, drawn in blocks."""
+
+    def __init__(self, seed=None, num_actions=6, block_size=65536):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_seq = seed
+        self.num_actions = num_actions
+        coin_seq, action_seq, general_seq = seed.spawn(3)
+        self._coin_gen = np.random.default_rng(coin_seq)
+        self._action_gen = np.random.default_rng(action_seq)
+        self._coins = _Stream(self._coin_gen.random, block_size)
+        self._actions = _Stream(lambda n: (self._action_gen.random(n) * num_actions).astype(np.int64), block_size)
+        self.generator = np.random.default_rng(general_seq)  # For anything else: start states, resets
+
+    # Function to draw one epsilon coin in [0, 1)
+    def coin(self):
+        return self._coins.next()
+
+    # Function to draw one uniformly random action
+    def action(self):
+        return self._actions.next()
+
+    # Function to pick one of n options uniformly (e.g. among the valid moves), from the coin stream
+    def index(self, n):
+        return int(self._coins.next() * n)
+
+    def coins(self, n):
+        return self._coins.take(n)
+
+    def actions(self, n):
+        return self._actions.take(n)
+
+    # Function to capture every generator and pre-drawn block, so a run can continue exactly
+    def get_state(self):
+        return {
+            "coin_generator": self._coin_gen.bit_generator.state,
+            "action_generator": self._action_gen.bit_generator.state,
+            "generator": self.generator.bit_generator.state,
+            "coins": self._coins.get_state(),
+            "actions": self._actions.get_state(),
+        }
+
+    def set_state(self, state):
+        self._coin_gen.bit_generator.state = state["coin_generator"]
+        self._action_gen.bit_generator.state = state["action_generator"]
+        self.generator.bit_generator.state = state["generator"]
+        self._coins.set_state(state["coins"])
+        self._actions.set_state(state["actions"])
+
+    # Function to create independent child streams, e.g. one per worker process
+    def spawn(self, n):
+        return [BlockRNG(child, self.num_actions, self._coins.block_size) for child in self.seed_seq.spawn(n)]
+
+
+# Function to accept either a BlockRNG or a seed
+def as_block_rng(rng_or_seed, num_actions):
+    if isinstance(rng_or_seed, BlockRNG):
+        if rng_or_seed.num_actions != num_actions:
+            raise ValueError(f"BlockRNG draws {rng_or_seed.num_actions} actions, but this trainer has {num_actions}")
+        return rng_or_seed
+    return BlockRNG(rng_or_seed, num_actions)
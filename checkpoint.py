@@ -0,0 +1,149 @@
+"""Crash-safe training checkpoints.
+
+A checkpoint is the full trainer state as a nested dict: Q-table,
+exploration rate, episode index, RNG states and the like. NumPy arrays
+inside it go into an .npz, and everything else goes into a JSON entry
+alongside them. Files are written to a temporary name, fsynced and renamed
+into place, so a crash leaves either the old checkpoint or the new one,
+never half of one.
+
+Checkpointer takes snapshots from the training loop and writes them on a
+background thread. If the writer is still busy, the newest snapshot
+replaces the pending one, so training never waits on the disk. Only the
+last `keep` checkpoints are retained.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+PATTERN = "checkpoint-{:010d}.npz"
+
+
+# Function to split a nested state dict into JSON-able metadata and a flat dict of arrays
+def _split(state, arrays, prefix=""):
+    if isinstance(state, np.ndarray):
+        key = prefix.rstrip(".") or "array"
+        arrays[key] = state
+        return {"__array__": key}
+    if isinstance(state, dict):
+        return {name: _split(value, arrays, f"{prefix}{name}.") for name, value in state.items()}
+    if isinstance(state, np.generic):
+        return state.item()
+    return state
+
+
+def _join(meta, arrays):
+    if isinstance(meta, dict):
+        if set(meta) == {"__array__"}:
+            return arrays[meta["__array__"]]
+        return {name: _join(value, arrays) for name, value in meta.items()}
+    return meta
+
+
+# Function to write a state dict to path atomically
+def write(path, state):
+    arrays = {}
+    meta = _split(state, arrays)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, __meta__=np.array(json.dumps(meta)), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# Function to read a state dict written by write()
+def load(path):
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != "__meta__"}
+        meta = json.loads(str(data["__meta__"]))
+    return _join(meta, arrays)
+
+
+# Function to list a directory's checkpoints, oldest first
+def _paths(directory):
+    return sorted(glob.glob(os.path.join(directory, PATTERN.replace("{:010d}", "*"))))
+
+
+# Function to find the newest checkpoint in a directory (None if there is none)
+def latest(directory):
+    paths = _paths(directory)
+    return paths[-1] if paths else None
+
+
+class Checkpointer:
+    """Periodic background checkpoints with bounded retention."""
+
+    def __init__(self, directory, interval=5.0, keep=3):
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.saved = 0
+        self._last = time.monotonic()
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    # True once interval seconds have passed since the last snapshot
+    def due(self):
+        return time.monotonic() - self._last >= self.interval
+
+    # Function to hand a snapshot to the writer; arrays are copied so training can keep mutating them
+    def save(self, step, state):
+        snapshot = _copy_arrays(state)
+        with self._lock:
+            self._pending = (step, snapshot)
+        self._last = time.monotonic()
+        self._wake.set()
+
+    def _write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        step, state = pending
+        write(os.path.join(self.directory, PATTERN.format(step)), state)
+        self.saved += 1
+        for old in _paths(self.directory)[:-self.keep]:
+            os.remove(old)
+
+    def _writer(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self._write_pending()
+
+    # Function to write any pending snapshot and stop the writer
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._write_pending()
+
+    # Function to delete every checkpoint, e.g. once the run has finished and saved its result
+    def clear(self):
+        for path in _paths(self.directory):
+            os.remove(path)
+
+
+def _copy_arrays(state):
+    if isinstance(state, np.ndarray):
+        return state.copy()
+    if isinstance(state, dict):
+        return {name: _copy_arrays(value) for name, value in state.items()}
+    return state
@@ -0,0 +1,127 @@
+"""Goal-conditioned BFS distance fields with an LRU cache.
+
+On the obstacle grids every step costs the same, so the shortest-path
+distance to the goal is a complete answer for "which way to the goal".
+distance_field() runs one breadth-first search out from the goal, and
+action_field() turns the distances into a greedy action per cell. A
+FieldCache keeps both for recently used (obstacle map, goal) pairs under a
+memory budget. Moving the goal back to a place already seen is a lookup,
+a new goal costs one BFS, and an obstacle edit changes the map hash, so
+only then are the cached fields for the old map out of use.
+"""
+import collections
+import hashlib
+
+import numpy as np
+
+import grid_world
+import policy
+
+UNREACHABLE = -1
+
+
+# Function to hash an occupancy mask (grid size included) into a cache key
+def map_key(blocked):
+    digest = hashlib.blake2b(np.packbits(blocked).tobytes(), digest_size=16)
+    digest.update(np.asarray(blocked.shape, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+# Function to compute steps to goal_pos from every cell (UNREACHABLE where there is no path)
+def distance_field(blocked, goal_pos, transitions=None):
+    grid_size = blocked.shape[0]
+    next_cell, valid = transitions or grid_world.grid_transitions(blocked)
+    dist = np.full(grid_size * grid_size, UNREACHABLE, dtype=np.int32)
+    goal = goal_pos[0] * grid_size + goal_pos[1]
+    dist[goal] = 0
+
+    # Grid moves are reversible, so expanding outward from the goal gives distances to it
+    frontier = np.array([goal])
+    steps = 0
+    while frontier.size:
+        steps += 1
+        neighbours = next_cell[frontier][valid[frontier]]
+        frontier = np.unique(neighbours[dist[neighbours] == UNREACHABLE])
+        dist[frontier] = steps
+    return dist
+
+
+# Function to pick, for every cell, the valid move to the neighbour closest to the goal
+def action_field(dist, transitions):
+    next_cell, valid = transitions
+    neighbour_dist = dist[next_cell]
+    usable = valid & (neighbour_dist != UNREACHABLE)
+    actions = np.where(usable, neighbour_dist, np.iinfo(np.int32).max).argmin(axis=1)
+    actions[~usable.any(axis=1)] = policy.NO_ACTION
+    return actions
+
+
+class GoalField:
+    """Distances to one goal and the greedy policy that follows them."""
+
+    def __init__(self, dist, actions, grid_size):
+        self.dist = dist
+        self.policy = policy.CompiledPolicy(actions, grid_size)
+
+    @property
+    def nbytes(self):
+        return self.dist.nbytes + self.policy.actions.nbytes
+
+    # Steps from (x, y) to the goal, or UNREACHABLE
+    def distance(self, pos):
+        return int(self.dist[pos[0] * self.policy.grid_size + pos[1]])
+
+
+class FieldCache:
+    """LRU store of GoalFields keyed by (obstacle-map hash, goal), bounded by memory."""
+
+    def __init__(self, budget_bytes=32 * 2 ** 20):
+        self.budget_bytes = budget_bytes
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._transitions = (None, None)  # (map key, grid_transitions) of the last map seen
+
+    # Function to get the field for goal_pos on this map, computing it on a miss
+    def get(self, blocked, goal_pos):
+        key = (map_key(blocked), tuple(goal_pos))
+        field = self.entries.get(key)
+        if field is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return field
+
+        self.misses += 1
+        if self._transitions[0] != key[0]:
+            self._transitions = (key[0], grid_world.grid_transitions(blocked))
+        transitions = self._transitions[1]
+        dist = distance_field(blocked, goal_pos, transitions)
+        field = GoalField(dist, action_field(dist, transitions), blocked.shape[0])
+        self.entries[key] = field
+        self.nbytes += field.nbytes
+        while self.nbytes > self.budget_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+        return field
+
+    # Function to get the compiled greedy policy for an obstacle set and goal
+    def policy(self, grid_size, obstacles, goal_pos):
+        return self.get(grid_world.obstacle_mask(grid_size, obstacles), goal_pos).policy
+
+    # Function to warm the cache for several goals (every free cell when goals is None)
+    def precompute(self, blocked, goals=None):
+        if goals is None:
+            goals = zip(*np.nonzero(~blocked))
+        for goal in goals:
+            self.get(blocked, (int(goal[0]), int(goal[1])))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,195 @@
+"""Dyna-Q planning on top of the Q-learning loops.
+
+Plain Q-learning uses each env.step() result once. Dyna-Q also writes it
+into a learned model and then replays remembered transitions as extra Q
+updates ("planning"), so most of the learning comes from the model and far
+fewer real steps are needed.
+
+Taxi-v3 and the grids are deterministic, so the model is one entry per
+(state, action): compact next-state / reward / done columns indexed by
+state * num_actions + action, plus a list of the pairs seen so far. For a
+TiledQTable the columns (and the priorities) are lazily allocated tiles
+too, so the model of a huge map only holds the explored area.
+Planning draws a batch of seen pairs and applies all their TD updates as
+one array operation. As in the batched trainers, pairs drawn more than once
+share their mean TD error.
+
+With prioritized=True the batch is not drawn uniformly. It is the pairs
+with the largest TD error, and after each batch the pairs leading into the
+updated states get their priorities recomputed (prioritized sweeping), so
+value changes spread backwards from the goal instead of waiting to be
+sampled.
+"""
+import numpy as np
+
+import sparse_q
+
+
+class TabularModel:
+    """Last observed (next_state, reward, done) for every (state, action) seen.
+
+    Columns are read and written through get/set functions on flat pair
+    indices: flat arrays, or tiles laid out like tiles (a TiledQTable).
+    """
+
+    def __init__(self, num_states, num_actions, reward_dtype=np.float32, tiles=None):
+        size = num_states * num_actions
+        self.num_states = num_states
+        self.num_actions = num_actions
+        self.next_state, self.set_next_state = sparse_q.column(size, np.int32, -1, tiles)  # -1 while unseen
+        self.reward, self.set_reward = sparse_q.column(size, reward_dtype, 0, tiles)
+        self.done, self.set_done = sparse_q.column(size, bool, False, tiles)
+        self.known = np.empty(64, dtype=np.int32)  # Seen pairs in the order they were first seen; grows by doubling
+        self.size = 0
+        self._by_successor = None  # (pairs sorted by next state, their next states), built on demand
+
+    # Function to append newly seen pairs to the known list
+    def _add_known(self, fresh):
+        needed = self.size + len(fresh)
+        if needed > len(self.known):
+            known = np.empty(max(needed, 2 * len(self.known)), dtype=np.int32)
+            known[:self.size] = self.pairs()
+            self.known = known
+        self.known[self.size:needed] = fresh
+        self.size = needed
+
+    # Function to store one transition; returns its flat pair index (the scalar path, for flat columns)
+    def record(self, state, action, next_state, reward, done):
+        idx = state * self.num_actions + action
+        previous = self.next_state(idx)
+        if previous != next_state:
+            if previous < 0:
+                self._add_known([idx])
+            self._by_successor = None
+        self.set_next_state(idx, next_state)
+        self.set_reward(idx, reward)
+        self.set_done(idx, done)
+        return idx
+
+    # Function to store a batch of transitions; returns their flat pair indices
+    def record_many(self, states, actions, next_states, rewards, dones):
+        idx = np.asarray(states) * self.num_actions + actions
+        previous = self.next_state(idx)
+        fresh = np.unique(idx[previous < 0])
+        self._add_known(fresh)
+        if fresh.size or (previous != next_states).any():
+            self._by_successor = None
+        self.set_next_state(idx, next_states)
+        self.set_reward(idx, rewards)
+        self.set_done(idx, dones)
+        return idx
+
+    def pairs(self):
+        return self.known[:self.size]
+
+    # Function to find every seen pair whose successor is one of states
+    def predecessors(self, states):
+        if self._by_successor is None:
+            pairs = self.pairs()
+            successors = self.next_state(pairs)
+            order = np.argsort(successors, kind="stable")
+            self._by_successor = (pairs[order], successors[order])
+        ordered, successors = self._by_successor
+        lo = np.searchsorted(successors, states, side="left")
+        counts = np.searchsorted(successors, states, side="right") - lo
+        # Concatenate the ranges ordered[lo:hi] without a Python loop
+        offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        return ordered[np.arange(counts.sum()) + offsets]
+
+    # Only the seen pairs are stored, so a snapshot follows the explored area too
+    def get_state(self):
+        pairs = self.pairs()
+        return {"known": pairs, "next_state": self.next_state(pairs), "reward": self.reward(pairs),
+                "done": self.done(pairs)}
+
+    def set_state(self, state):
+        self.size = 0
+        self._add_known(state["known"])
+        pairs = self.pairs()
+        self.set_next_state(pairs, state["next_state"])
+        self.set_reward(pairs, state["reward"])
+        self.set_done(pairs, state["done"])
+        self._by_successor = None
+
+
+class DynaPlanner:
+    """Records real transitions into a TabularModel and runs batched planning updates on a Q-table."""
+
+    def __init__(self, q_table, planning_steps=10, learning_rate=0.1, discount_rate=0.99,
+                 prioritized=False, theta=1e-4, generator=None):
+        num_actions = q_table.shape[-1]
+        num_states = int(np.prod(q_table.shape[:-1]))
+        self.q_table, self.q_rows, self.q_get, self.q_add = sparse_q.accessors(q_table, num_actions)
+        tiles = q_table if isinstance(q_table, sparse_q.TiledQTable) else None
+        self.model = TabularModel(num_states, num_actions, tiles=tiles)
+        self.planning_steps = planning_steps
+        self.learning_rate = learning_rate
+        self.discount_rate = discount_rate
+        self.prioritized = prioritized
+        self.theta = theta
+        self.generator = generator if generator is not None else np.random.default_rng()
+        if prioritized:
+            self.priority, self.set_priority = sparse_q.column(num_states * num_actions, np.float64, 0, tiles)
+        self.updates = 0
+
+    # Function to compute model TD errors for flat pair indices under the current Q-table
+    def _td_errors(self, idx):
+        model = self.model
+        best_next = self.q_rows(model.next_state(idx)).max(axis=1)
+        target = model.reward(idx) + self.discount_rate * best_next * ~model.done(idx)
+        return target - self.q_get(idx)
+
+    # Function to record one real transition (after the caller's own Q update)
+    def record(self, state, action, next_state, reward, done):
+        idx = self.model.record(state, action, next_state, reward, done)
+        if self.prioritized:
+            self.set_priority(idx, abs(self._td_errors(np.array([idx]))[0]))
+
+    def record_many(self, states, actions, next_states, rewards, dones):
+        idx = self.model.record_many(states, actions, next_states, rewards, dones)
+        if self.prioritized:
+            self.set_priority(idx, np.abs(self._td_errors(idx)))
+
+    # Function to pick the pairs for one planning batch
+    def _batch(self, n):
+        pairs = self.model.pairs()
+        if not self.prioritized:
+            return pairs[self.generator.integers(0, pairs.size, n)]
+        if pairs.size > n:
+            pairs = pairs[np.argpartition(self.priority(pairs), -n)[-n:]]
+        return pairs[self.priority(pairs) > self.theta]
+
+    # Function to run one batch of planning updates; returns how many pairs were updated
+    def plan(self, n=None):
+        n = self.planning_steps if n is None else n
+        if n <= 0 or self.model.size == 0:
+            return 0
+        idx = self._batch(n)
+        if idx.size == 0:
+            return 0
+
+        td_error = self._td_errors(idx)
+        self.updates += idx.size
+        if self.prioritized:
+            # Top-priority pairs are distinct, so the batch applies directly
+            self.q_add(idx, self.learning_rate * td_error)
+            # The updated pairs and everything leading into their states now have new TD errors
+            stale = np.concatenate([idx, self.model.predecessors(idx // self.model.num_actions)])
+            self.set_priority(stale, np.abs(self._td_errors(stale)))
+        else:
+            sparse_q.td_apply(self.q_add, idx, td_error, self.learning_rate)
+        return idx.size
+
+    def get_state(self):
+        state = {"model": self.model.get_state(), "generator": self.generator.bit_generator.state,
+                 "updates": self.updates}
+        if self.prioritized:
+            state["priority"] = self.priority(self.model.pairs())  # Unseen pairs stay at zero
+        return state
+
+    def set_state(self, state):
+        self.model.set_state(state["model"])
+        self.generator.bit_generator.state = state["generator"]
+        self.updates = state["updates"]
+        if self.prioritized:
+            self.set_priority(self.model.pairs(), state["priority"])
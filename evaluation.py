@@ -0,0 +1,89 @@
+"""Headless, exhaustive evaluation of greedy policies.
+
+Both Taxi-v3 and the grids are deterministic, so a greedy policy maps
+every state to exactly one successor. Steps and return to termination are
+solved for all states at once by iterating steps[s] = 1 + steps[next[s]]
+over the policy graph. States that never settle are caught in a loop.
+Every valid start is covered (all 300 Taxi-v3 starts, every free grid
+cell) in milliseconds, with no rendering. Grid audits act through
+policy.compile_grid(), so they judge exactly the moves the GUIs make.
+"""
+import numpy as np
+
+import grid_world
+import policy
+import taxi_vec_env
+
+
+# Function to compute steps and undiscounted return to termination from every state under a policy
+def policy_outcomes(next_state, reward, done, actions):
+    num_states = next_state.shape[0]
+    rows = np.arange(num_states)
+    nxt, rew, term = next_state[rows, actions], reward[rows, actions], done[rows, actions]
+
+    steps = np.full(num_states, np.inf)
+    returns = np.zeros(num_states)
+    # Each sweep settles states one step further from termination; loops stay at inf
+    for _ in range(num_states + 1):
+        new_steps = np.where(term, 1, 1 + steps[nxt])
+        returns = np.where(term, rew, rew + returns[nxt])
+        if np.array_equal(new_steps, steps):
+            break
+        steps = new_steps
+    returns[np.isinf(steps)] = np.nan
+    return steps, returns
+
+
+# Function to summarize outcomes over a set of start states
+def summarize(steps, returns, max_steps):
+    loops = np.isinf(steps)
+    success = steps <= max_steps
+    report = {
+        "starts": int(steps.size),
+        "success_rate": float(success.mean()) if steps.size else 0.0,
+        "loops": int(loops.sum()),
+        "timeouts": int((~loops & ~success).sum()),
+    }
+    if success.any():
+        ok_steps = steps[success]
+        report.update({
+            "mean_steps": float(ok_steps.mean()),
+            "p50_steps": float(np.percentile(ok_steps, 50)),
+            "p90_steps": float(np.percentile(ok_steps, 90)),
+            "p99_steps": float(np.percentile(ok_steps, 99)),
+            "longest_steps": float(ok_steps.max()),
+            "mean_return": float(returns[success].mean()),
+        })
+    return report
+
+
+# Function to audit a Taxi-v3 q_table from all 300 valid start states
+def evaluate_taxi(q_table, max_steps=200):
+    actions = np.argmax(q_table, axis=1)
+    steps, returns = policy_outcomes(taxi_vec_env.NEXT_STATE, taxi_vec_env.REWARD, taxi_vec_env.DONE, actions)
+    starts = taxi_vec_env.INITIAL_STATES
+    return summarize(steps[starts], returns[starts], max_steps)
+
+
+# Function to audit a grid Q_table from every free cell, following the same compiled policy the GUIs act on
+def evaluate_grid(q_table, obstacles, goal_pos, mask_invalid=True, max_steps=None, goal_reward=100, step_reward=-1):
+    grid_size = q_table.shape[0]
+    blocked = grid_world.obstacle_mask(grid_size, obstacles)
+    next_cell, reward, done = grid_world.grid_model(blocked, goal_pos, goal_reward, step_reward)
+
+    actions = policy.compile_grid(q_table, blocked, mask_invalid).actions
+    # A boxed-in cell has no move at all; any action leaves it in place, so it shows up as a loop
+    actions = np.where(actions == policy.NO_ACTION, 0, actions)
+    steps, returns = policy_outcomes(next_cell, reward, done, actions)
+
+    goal = goal_pos[0] * grid_size + goal_pos[1]
+    starts = np.flatnonzero(~blocked.ravel())
+    starts = starts[starts != goal]
+    return summarize(steps[starts], returns[starts], max_steps or grid_size * grid_size)
+
+
+# Function to print a report one metric per line
+def print_report(report, title="Policy audit"):
+    print(f"--- {title} ---")
+    for name, value in report.items():
+        print(f"{name}: {round(value, 3) if isinstance(value, float) else value}")
@@ -0,0 +1,164 @@
+"""Multi-taxi fleet simulation with structure-of-arrays state.
+
+TaxiFleet follows the Taxi-v3 rules and GridFleet the obstacle-grid rules
+from Taxi_movement_gui.py. Every taxi's position, passenger status and
+destination live in contiguous NumPy arrays, and one tick advances the
+whole fleet with a compiled policy lookup and table-driven moves. When a
+trip finishes (or runs out of steps) that taxi gets a new job on the spot.
+"""
+import time
+
+import numpy as np
+
+import block_rng
+import grid_world
+import policy
+import taxi_vec_env
+
+
+class _FleetStats:
+    """Per-tick throughput and trip completion counters."""
+
+    def __init__(self):
+        self.ticks = 0
+        self.taxi_steps = 0
+        self.seconds = 0.0
+        self.last_tick_seconds = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.trip_steps = 0
+        self.trip_reward = 0.0
+
+    def record(self, num_taxis, seconds, completed, failed, steps, reward):
+        self.ticks += 1
+        self.taxi_steps += num_taxis
+        self.seconds += seconds
+        self.last_tick_seconds = seconds
+        self.completed += completed
+        self.failed += failed
+        self.trip_steps += steps
+        self.trip_reward += reward
+
+    def report(self):
+        trips = self.completed + self.failed
+        return {
+            "ticks": self.ticks,
+            "taxi_steps_per_sec": self.taxi_steps / self.seconds if self.seconds else 0.0,
+            "last_tick_ms": self.last_tick_seconds * 1e3,
+            "completed_trips": self.completed,
+            "failed_trips": self.failed,
+            "completion_rate": self.completed / trips if trips else 0.0,
+            "mean_trip_steps": self.trip_steps / trips if trips else 0.0,
+            "mean_trip_reward": self.trip_reward / trips if trips else 0.0,
+        }
+
+
+class TaxiFleet:
+    """N taxis on the Taxi-v3 map, each serving one passenger at a time."""
+
+    def __init__(self, num_taxis, greedy, max_trip_steps=200, seed=None):
+        self.greedy = greedy if isinstance(greedy, policy.CompiledPolicy) else policy.compile_taxi(greedy)
+        self.max_trip_steps = max_trip_steps
+        self.rng = block_rng.BlockRNG(seed).generator
+        start = self.rng.choice(taxi_vec_env.INITIAL_STATES, size=num_taxis)
+        row, col, pass_loc, dest = taxi_vec_env.decode_state(start)
+        self.row = row.astype(np.int8)
+        self.col = col.astype(np.int8)
+        self.pass_loc = pass_loc.astype(np.int8)  # 0-3: waiting at a stand, 4: in the taxi
+        self.dest = dest.astype(np.int8)
+        self.trip_steps = np.zeros(num_taxis, dtype=np.int32)
+        self.trip_reward = np.zeros(num_taxis, dtype=np.int32)
+        self.stats = _FleetStats()
+
+    @property
+    def num_taxis(self):
+        return self.row.size
+
+    # Function to give the taxis in mask a new passenger at a stand other than its destination
+    def _new_jobs(self, mask):
+        count = int(mask.sum())
+        pass_loc = self.rng.integers(4, size=count)
+        dest = (pass_loc + self.rng.integers(1, 4, size=count)) % 4
+        self.pass_loc[mask] = pass_loc
+        self.dest[mask] = dest
+        self.trip_steps[mask] = 0
+        self.trip_reward[mask] = 0
+
+    # Function to advance every taxi one step
+    def tick(self):
+        start = time.perf_counter()
+        states = taxi_vec_env.encode_state(self.row.astype(np.int32), self.col, self.pass_loc, self.dest)
+        actions = self.greedy.act(states)
+        next_states = taxi_vec_env.NEXT_STATE[states, actions]
+        done = taxi_vec_env.DONE[states, actions]
+        self.trip_reward += taxi_vec_env.REWARD[states, actions]
+        self.trip_steps += 1
+
+        row, col, pass_loc, _ = taxi_vec_env.decode_state(next_states)
+        self.row[:], self.col[:], self.pass_loc[:] = row, col, pass_loc
+
+        failed = ~done & (self.trip_steps >= self.max_trip_steps)
+        finished = done | failed
+        steps, reward = int(self.trip_steps[finished].sum()), float(self.trip_reward[finished].sum())
+        if finished.any():
+            self._new_jobs(finished)
+        self.stats.record(self.num_taxis, time.perf_counter() - start,
+                          int(done.sum()), int(failed.sum()), steps, reward)
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            self.tick()
+        return self.stats.report()
+
+
+class GridFleet:
+    """N cars driving to the goal on an obstacle grid; arrivals respawn on a random free cell."""
+
+    def __init__(self, num_taxis, q_table, obstacles, goal_pos, max_trip_steps=None, seed=None):
+        self.grid_size = q_table.shape[0]
+        blocked = grid_world.obstacle_mask(self.grid_size, obstacles)
+        self.greedy = policy.compile_grid(q_table, blocked)
+        self.next_cell, _ = grid_world.grid_transitions(blocked)
+        self.goal = goal_pos[0] * self.grid_size + goal_pos[1]
+        self.max_trip_steps = max_trip_steps or self.grid_size * self.grid_size
+        self.rng = block_rng.BlockRNG(seed).generator
+
+        free = np.flatnonzero(~blocked.ravel())
+        self.spawn_cells = free[free != self.goal]
+        self.cell = self.rng.choice(self.spawn_cells, size=num_taxis).astype(np.int32)
+        self.trip_steps = np.zeros(num_taxis, dtype=np.int32)
+        self.stats = _FleetStats()
+
+    @property
+    def num_taxis(self):
+        return self.cell.size
+
+    # Positions as (x, y) arrays
+    @property
+    def positions(self):
+        return np.divmod(self.cell, self.grid_size)
+
+    # Function to advance every car one step
+    def tick(self):
+        start = time.perf_counter()
+        actions = self.greedy.act(self.cell)
+        stuck = actions == policy.NO_ACTION
+        self.cell = np.where(stuck, self.cell, self.next_cell[self.cell, np.where(stuck, 0, actions)])
+        self.trip_steps += 1
+
+        done = self.cell == self.goal
+        failed = ~done & (self.trip_steps >= self.max_trip_steps)
+        finished = done | failed
+        trip_steps = self.trip_steps[finished]
+        # Same scoring as move_agent(): 100 for the goal, -1 for every other step
+        reward = float(np.where(done[finished], 100 - trip_steps + 1, -trip_steps).sum())
+        if finished.any():
+            self.cell[finished] = self.rng.choice(self.spawn_cells, size=int(finished.sum()))
+            self.trip_steps[finished] = 0
+        self.stats.record(self.num_taxis, time.perf_counter() - start,
+                          int(done.sum()), int(failed.sum()), int(trip_steps.sum()), reward)
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            self.tick()
+        return self.stats.report()
@@ -0,0 +1,101 @@
+"""Batched Q-learning for the obstacle grids.
+
+Advances many agents per step with array ops instead of walking one agent
+through Python loops. Obstacles are a boolean occupancy array, and
+epsilon-greedy selection, the bounds/obstacle check and the TD update are
+all masked vector operations. It fills the same (GRID_SIZE, GRID_SIZE, 4)
+Q_table as train_q_table() in Taxi_movement_gui.py.
+"""
+import numpy as np
+
+import block_rng
+import dyna
+import grid_world
+import instrument
+import sparse_q
+
+
+# Function to train a grid Q-table with many agents at once
+@instrument.timed("grid.train")
+def train_q_table(grid_size, obstacles, start_pos, goal_pos, episodes=1500, alpha=0.5, gamma=0.9,
+                  epsilon=0.8, max_steps=100, goal_reward=100, step_reward=-1, num_agents=256,
+                  q_table=None, seed=None, rng=None, reward_table=None, planning_steps=0,
+                  prioritized_sweeping=False, planner=None):
+    # Obstacles may be a set of (x, y) tuples or an occupancy array already
+    if isinstance(obstacles, np.ndarray):
+        blocked = obstacles
+    else:
+        blocked = grid_world.obstacle_mask(grid_size, obstacles)
+    goal = goal_pos[0] * grid_size + goal_pos[1]
+
+    # A TiledQTable only allocates the tiles the agents actually reach. It also skips the per-cell move
+    # and free-cell tables: moves and start cells are worked out for the agents' cells as they go, so
+    # memory follows the explored area (plus the one-byte-per-cell obstacle mask), not the map area.
+    tiled = isinstance(q_table, sparse_q.TiledQTable)
+    if tiled:
+        num_free = blocked.size - np.count_nonzero(blocked)
+    else:
+        next_cell, valid = grid_world.grid_transitions(blocked)
+        free_cells = np.flatnonzero(~blocked.ravel())
+
+    if q_table is None:
+        q_table = np.zeros((grid_size, grid_size, grid_world.NUM_ACTIONS))
+    q_table, q_rows, q_get, q_add = sparse_q.accessors(q_table, grid_world.NUM_ACTIONS)
+
+    # rng is a BlockRNG (so chunked runs continue one stream); otherwise one is made from seed
+    rng = block_rng.as_block_rng(rng if rng is not None else seed, grid_world.NUM_ACTIONS)
+    # Profiled phases (TAXI_PROFILE=1); the Q update is the train span's self time
+    coins, random_actions = instrument.wrap("rng.coins", rng.coins), instrument.wrap("rng.actions", rng.actions)
+    # Dyna-Q: moves are also stored in a model and replayed as planning_steps updates per moving agent.
+    # Pass a DynaPlanner as planner to keep one model across chunked calls.
+    if planner is None and planning_steps:
+        planner = dyna.DynaPlanner(q_table, planning_steps, alpha, gamma, prioritized=prioritized_sweeping,
+                                   generator=rng.generator)
+    if planner is not None:
+        plan = instrument.wrap("dyna.plan", planner.plan)
+    remaining = episodes
+
+    # Episodes run in waves of up to num_agents agents in lockstep
+    while remaining > 0:
+        n = min(num_agents, remaining)
+        remaining -= n
+        if start_pos is None and tiled:
+            # The same draw as choice() below, resolved without the free-cell list
+            cells = grid_world.free_cells_at(blocked, rng.generator.integers(0, num_free, n))
+        elif start_pos is None:
+            cells = rng.generator.choice(free_cells, size=n)
+        else:
+            cells = np.full(n, start_pos[0] * grid_size + start_pos[1])
+
+        for _ in range(max_steps):
+            active = cells != goal
+            if not active.any():
+                break
+
+            # Exploration vs Exploitation
+            explore = coins(n) < epsilon
+            actions = np.where(explore, random_actions(n), q_rows(cells).argmax(axis=1))
+
+            # Only agents whose move stays in bounds and off obstacles learn and move
+            if tiled:
+                targets, allowed = grid_world.grid_moves(blocked, cells, actions)
+            else:
+                targets, allowed = next_cell[cells, actions], valid[cells, actions]
+            moved = active & allowed
+            states, acts, new_states = cells[moved], actions[moved], targets[moved]
+            if reward_table is None:
+                reward = np.where(new_states == goal, goal_reward, step_reward)
+            else:
+                reward = reward_table[states, acts]  # Precomputed (cells, 4) shaped rewards
+
+            # TD update
+            idx = states * grid_world.NUM_ACTIONS + acts
+            td_error = reward + gamma * q_rows(new_states).max(axis=1) - q_get(idx)
+            sparse_q.td_apply(q_add, idx, td_error, alpha)
+            if planner is not None:
+                planner.record_many(states, acts, new_states, reward, new_states == goal)
+                plan(planner.planning_steps * states.size)
+
+            cells[moved] = new_states
+
+    return q_table
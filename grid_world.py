@@ -0,0 +1,79 @@
+"""Array form of the obstacle grid worlds.
+
+Shared by the planners and trainers for Taxi_movement_gui.py and
+import pygame.py: obstacles become a boolean occupancy array and moves
+become a (cells, 4) table of next-cell indices.
+"""
+import numpy as np
+
+# Same action order as the GUIs: Left, Right, Up, Down as (dx, dy) on (row, col)
+ACTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)])
+NUM_ACTIONS = len(ACTIONS)
+
+
+# Function to turn a set of (x, y) obstacles into a boolean occupancy array
+def obstacle_mask(grid_size, obstacles):
+    blocked = np.zeros((grid_size, grid_size), dtype=bool)
+    if obstacles:
+        rows, cols = zip(*obstacles)
+        blocked[list(rows), list(cols)] = True
+    return blocked
+
+
+# Function to build the move table: next cell for every (cell, action), staying put on invalid moves
+# With cells (flat indices) given, only those rows are built, so large maps never need the full table
+def grid_transitions(blocked, cells=None):
+    grid_size = blocked.shape[0]
+    if cells is None:
+        cells = np.arange(grid_size * grid_size)
+    rows, cols = np.divmod(cells, grid_size)
+    new_rows = rows[:, None] + ACTIONS[:, 0]
+    new_cols = cols[:, None] + ACTIONS[:, 1]
+
+    valid = (new_rows >= 0) & (new_rows < grid_size) & (new_cols >= 0) & (new_cols < grid_size)
+    valid[valid] = ~blocked[new_rows[valid], new_cols[valid]]
+
+    here = np.broadcast_to(np.asarray(cells)[:, None], valid.shape)
+    next_cell = np.where(valid, new_rows * grid_size + new_cols, here).astype(np.int32)
+    return next_cell, valid
+
+
+# Function to apply one action per cell without a move table; returns (next cells, valid)
+def grid_moves(blocked, cells, actions):
+    grid_size = blocked.shape[0]
+    rows, cols = np.divmod(cells, grid_size)
+    new_rows = rows + ACTIONS[actions, 0]
+    new_cols = cols + ACTIONS[actions, 1]
+
+    valid = (new_rows >= 0) & (new_rows < grid_size) & (new_cols >= 0) & (new_cols < grid_size)
+    valid[valid] = ~blocked[new_rows[valid], new_cols[valid]]
+    return np.where(valid, new_rows * grid_size + new_cols, cells).astype(np.int32), valid
+
+
+# Function to find the free cells with the given ranks in row-major order, without listing every free cell
+def free_cells_at(blocked, ranks):
+    grid_size = blocked.shape[0]
+    free_in_row = grid_size - np.count_nonzero(blocked, axis=1)
+    free_before = np.cumsum(free_in_row) - free_in_row
+    rows = np.searchsorted(free_before, ranks, side="right") - 1
+    cells = np.empty(len(ranks), dtype=np.int64)
+    for row in np.unique(rows):
+        picked = rows == row
+        cells[picked] = row * grid_size + np.flatnonzero(~blocked[row])[ranks[picked] - free_before[row]]
+    return cells
+
+
+# Function to build the deterministic (next_state, reward, done) model of a grid
+def grid_model(blocked, goal_pos, goal_reward=100, step_reward=-1):
+    grid_size = blocked.shape[0]
+    goal = goal_pos[0] * grid_size + goal_pos[1]
+    next_cell, valid = grid_transitions(blocked)
+
+    done = next_cell == goal
+    reward = np.where(done, goal_reward, step_reward).astype(np.float64)
+
+    # The goal itself is absorbing so its Q-values stay at zero
+    next_cell[goal] = goal
+    reward[goal] = 0
+    done[goal] = True
+    return next_cell, reward, done
@@ -1,7 +1,16 @@
+import os
+
 import numpy as np
 import tkinter as tk
-import math
-import random
+
+import block_rng
+import distance_fields
+import grid_world
+import instrument
+import policy
+import qtable_io
+import reward_shaping
+import tk_grid_view
 
 # Grid size
 GRID_SIZE = 10
@@ -20,62 +29,50 @@ EMPTY_CELL = "⬜"
 Q_table = np.zeros((GRID_SIZE, GRID_SIZE, 4))  
 ACTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  
 ALPHA, GAMMA, EPSILON = 0.3, 0.9, 0.2  
+SEED = None  # Seed for training's block RNG; None trains differently each time
+POLICY = None  # Compiled greedy policy; rebuilt after training, obstacle or goal edits
+TRAINED_GOAL = None  # Goal Q_table was trained for; other goals drive from cached distance fields
+FIELDS = distance_fields.FieldCache()
+SHAPING = ("euclidean", "toward")  # Reward shaping (distance, mode); see reward_shaping.py
+REWARDS = None  # (cells, 4) shaped rewards; rebuilt after goal or obstacle edits
+TABLE_PATH = "tk_q_table.qtbl"  # Saved after training; any quantize.py export of it loads as well
 
 # Step and Score
 step_count = 0
 total_score = 0
 
-# Tkinter GUI setup
-root = tk.Tk()
-root.title("RL Obstacle Avoidance Robot 🚗")
-
-# Function to draw grid with emojis
-def draw_grid():
-    for widget in grid_frame.winfo_children():
-        widget.destroy()  
-
-    for x in range(GRID_SIZE):
-        for y in range(GRID_SIZE):
-            cell_text = EMPTY_CELL
-            if (x, y) == AGENT_POS:
-                cell_text = AGENT_EMOJI
-            elif (x, y) == GOAL_POS:
-                cell_text = GOAL_EMOJI
-            elif (x, y) in OBSTACLES:
-                cell_text = OBSTACLE_EMOJI
-
-            label = tk.Label(grid_frame, text=cell_text, font=("Arial", 16), width=3, height=1, bg="#D0E0F0")
-            label.grid(row=x, column=y, padx=2, pady=2)
-            label.bind("<Button-1>", lambda event, row=x, col=y: toggle_obstacle(row, col))  
-
-    step_label.config(text=f"Steps: {step_count}")
-    score_label.config(text=f"Score: {total_score}")
+# Tkinter window and widgets are created in main(), so importing this file opens no window
+root = grid_view = goal_x = goal_y = step_label = score_label = status_label = None
 
-# Function to calculate Euclidean distance
-def calculate_distance(pos1, pos2):
-    return math.sqrt((pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2)
+# Function to pick the emoji shown in a cell
+def cell_text(pos):
+    if pos == AGENT_POS:
+        return AGENT_EMOJI
+    elif pos == GOAL_POS:
+        return GOAL_EMOJI
+    elif pos in OBSTACLES:
+        return OBSTACLE_EMOJI
+    return EMPTY_CELL
 
-# Function to calculate reward
-def calculate_reward(prev_pos, new_pos):
-    global step_count
+# Function to draw grid with emojis; only the given cells are redrawn (all of them when none are given)
+@instrument.timed("draw_grid")
+def draw_grid(*cells):
+    grid_view.refresh(*cells)
 
-    prev_distance = calculate_distance(prev_pos, GOAL_POS)
-    new_distance = calculate_distance(new_pos, GOAL_POS)
-
-    reward = -1  # Small penalty for each step
-    if new_pos == GOAL_POS:
-        reward += 5  # Bonus for reaching the goal
-    elif new_distance < prev_distance:
-        reward += 2  # Reward for moving towards the goal
-    else:
-        reward -= 2  # Penalty for moving away
-
-    if new_pos in OBSTACLES:
-        reward -= 10  # Heavy penalty for hitting an obstacle
+    step_label.config(text=f"Steps: {step_count}")
+    score_label.config(text=f"Score: {total_score}")
 
-    return reward
+# Function to get the shaped reward table, indexed [x * GRID_SIZE + y, action]
+# -1 per step, +5 for the goal, +2 for moving towards it, -2 for moving away, -10 for hitting an obstacle
+def shaping_rewards():
+    global REWARDS
+    if REWARDS is None:
+        blocked = grid_world.obstacle_mask(GRID_SIZE, OBSTACLES)
+        REWARDS = reward_shaping.reward_table(blocked, GOAL_POS, *SHAPING, gamma=GAMMA)
+    return REWARDS
 
 # Function to get valid moves
+@instrument.timed("get_valid_moves")
 def get_valid_moves(pos):
     x, y = pos
     valid_moves = []
@@ -88,8 +85,11 @@ def get_valid_moves(pos):
     return valid_moves
 
 # Function to train the Q-table
+@instrument.timed("train")
 def train_agent(episodes=500):
-    global Q_table
+    global Q_table, POLICY, TRAINED_GOAL
+    rewards = shaping_rewards()
+    rng = block_rng.BlockRNG(SEED, grid_world.NUM_ACTIONS)
 
     for _ in range(episodes):
         state = START_POS
@@ -98,12 +98,12 @@ def train_agent(episodes=500):
             if not valid_moves:
                 break  
 
-            if np.random.rand() < EPSILON:
-                action, next_state = random.choice(valid_moves)  
+            if rng.coin() < EPSILON:
+                action, next_state = valid_moves[rng.index(len(valid_moves))]  
             else:
                 action, next_state = max(valid_moves, key=lambda move: Q_table[state[0], state[1], move[0]])  
 
-            reward = calculate_reward(state, next_state)
+            reward = rewards[state[0] * GRID_SIZE + state[1], action]
 
             # Update Q-table using Bellman equation
             best_next_action = max(get_valid_moves(next_state), key=lambda move: Q_table[next_state[0], next_state[1], move[0]], default=(0, next_state))[0]
@@ -113,39 +113,89 @@ def train_agent(episodes=500):
 
             state = next_state  
 
+    TRAINED_GOAL = GOAL_POS
+    POLICY = None
+    save_table()
     print("Training Complete!")
 
+# Function to save the Q-table with the map and goal it was trained for
+def save_table():
+    qtable_io.save_q_table(TABLE_PATH, Q_table, env_id="grid", hyperparameters={
+        "obstacles": sorted(OBSTACLES), "goal": list(TRAINED_GOAL), "start": list(START_POS),
+        "alpha": ALPHA, "gamma": GAMMA, "epsilon": EPSILON, "shaping": list(SHAPING),
+    })
+
+# Function to load a saved table (float, int8 or packed-policy export) and the map it was trained on
+def load_table(path=TABLE_PATH):
+    global GOAL_POS, TRAINED_GOAL, POLICY
+    if not os.path.exists(path):
+        return False
+    header = qtable_io.read_header(path)
+    if tuple(header["shape"]) != Q_table.shape or "goal" not in header["hyperparameters"]:
+        return False
+    Q_table[:] = qtable_io.load_q_table(path)
+    OBSTACLES.clear()
+    OBSTACLES.update(tuple(o) for o in header["hyperparameters"]["obstacles"])
+    GOAL_POS = TRAINED_GOAL = tuple(header["hyperparameters"]["goal"])
+    POLICY = qtable_io.load_policy(path)
+    print(f"Loaded {path} ({header.get('encoding', header.get('dtype'))})")
+    return True
+
+# Function to get the compiled greedy policy, compiling it after the Q-table, obstacles or goal change
+def greedy_policy():
+    global POLICY
+    if POLICY is None:
+        if TRAINED_GOAL is not None and GOAL_POS != TRAINED_GOAL:
+            POLICY = FIELDS.policy(GRID_SIZE, OBSTACLES, GOAL_POS)  # Q_table points at another goal
+        else:
+            POLICY = policy.compile_grid(Q_table, OBSTACLES)
+    return POLICY
+
 # Function to move agent autonomously
+@instrument.timed("move_agent")
 def move_agent():
     global AGENT_POS, step_count, total_score
 
     prev_pos = AGENT_POS
-    valid_moves = get_valid_moves(AGENT_POS)
+    # Choose best valid move from the compiled Q-table policy
+    action = greedy_policy().action(AGENT_POS)
 
-    if not valid_moves:
+    if action == policy.NO_ACTION:
         status_label.config(text="🚗 No valid moves! Reset obstacles.")
-        return
+        return False
 
-    # Choose best move from trained Q-table
-    action, new_pos = max(valid_moves, key=lambda move: Q_table[AGENT_POS[0], AGENT_POS[1], move[0]])  
+    new_pos = (AGENT_POS[0] + ACTIONS[action][0], AGENT_POS[1] + ACTIONS[action][1])
 
     # Only increment step count if the agent actually moves
     if new_pos != AGENT_POS:  
         step_count += 1
         print(f"Step {step_count}: Moving to {new_pos}")  # Debugging
 
-    reward = calculate_reward(prev_pos, new_pos)
+    reward = shaping_rewards()[prev_pos[0] * GRID_SIZE + prev_pos[1], action]
     total_score += reward
     AGENT_POS = new_pos  
 
-    draw_grid()
+    draw_grid(prev_pos, new_pos)
 
     if AGENT_POS == GOAL_POS:
         status_label.config(text="🚗 Reached the Goal! 🏁")
         print(f"Total Steps Taken: {step_count}")  
+        return False
+    return True
+
+# Function to run the agent autonomously, one animated step per tick, until it stops or runs out of steps
+def run_agent(max_steps=GRID_SIZE * GRID_SIZE):
+    steps_left = [max_steps]
+
+    def step():
+        steps_left[0] -= 1
+        return move_agent() and steps_left[0] > 0
+
+    grid_view.animate(step, interval_ms=100)
 
 # Function to toggle obstacles by clicking
 def toggle_obstacle(x, y):
+    global POLICY, REWARDS
     if (x, y) == START_POS or (x, y) == GOAL_POS:
         return  
 
@@ -154,42 +204,58 @@ def toggle_obstacle(x, y):
     else:
         OBSTACLES.add((x, y))  
 
-    draw_grid()
+    POLICY = REWARDS = None
+    draw_grid((x, y))
 
 # Function to set goal position
 def set_goal():
-    global GOAL_POS
+    global GOAL_POS, POLICY, REWARDS
     x, y = int(goal_x.get()), int(goal_y.get())
-    if (x, y) not in OBSTACLES:
-        GOAL_POS = (x, y)
-        draw_grid()
-
-# Layout
-grid_frame = tk.Frame(root, bg="#D0E0F0")
-grid_frame.pack()
-
-control_frame = tk.Frame(root)
-control_frame.pack()
-
-tk.Label(control_frame, text="Goal (x, y):").grid(row=0, column=0)
-goal_x, goal_y = tk.Entry(control_frame, width=5), tk.Entry(control_frame, width=5)
-goal_x.grid(row=0, column=1)
-goal_y.grid(row=0, column=2)
-tk.Button(control_frame, text="Set Goal", command=set_goal).grid(row=0, column=3)
-
-# Training button
-tk.Button(root, text="Train Agent 🏆", command=lambda: train_agent(500), font=("Arial", 12)).pack()
-
-# Move Step button (Autonomous movement)
-tk.Button(root, text="Move Step 🚗", command=move_agent, font=("Arial", 12)).pack()
-
-step_label = tk.Label(root, text="Steps: 0", font=("Arial", 14))
-step_label.pack()
-score_label = tk.Label(root, text="Score: 0", font=("Arial", 14))
-score_label.pack()
-status_label = tk.Label(root, text="", font=("Arial", 14))
-status_label.pack()
-
-# Initial draw
-draw_grid()
-root.mainloop()
+    if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE and (x, y) not in OBSTACLES:
+        old_goal, GOAL_POS = GOAL_POS, (x, y)
+        POLICY = REWARDS = None
+        draw_grid(old_goal, GOAL_POS)
+
+# Function to open the window, lay out the widgets, load the saved table and run the main loop
+def main():
+    global root, grid_view, goal_x, goal_y, step_label, score_label, status_label
+    root = tk.Tk()
+    root.title("RL Obstacle Avoidance Robot 🚗")
+
+    # Layout
+    grid_view = tk_grid_view.GridView(root, GRID_SIZE, cell_text, on_click=toggle_obstacle)
+    grid_view.canvas.pack()
+
+    control_frame = tk.Frame(root)
+    control_frame.pack()
+
+    tk.Label(control_frame, text="Goal (x, y):").grid(row=0, column=0)
+    goal_x, goal_y = tk.Entry(control_frame, width=5), tk.Entry(control_frame, width=5)
+    goal_x.grid(row=0, column=1)
+    goal_y.grid(row=0, column=2)
+    tk.Button(control_frame, text="Set Goal", command=set_goal).grid(row=0, column=3)
+
+    # Training button
+    tk.Button(root, text="Train Agent 🏆", command=lambda: train_agent(500), font=("Arial", 12)).pack()
+
+    # Move Step button (Autonomous movement)
+    tk.Button(root, text="Move Step 🚗", command=move_agent, font=("Arial", 12)).pack()
+
+    # Run button (Animated autonomous run to the goal)
+    tk.Button(root, text="Run to Goal ▶", command=run_agent, font=("Arial", 12)).pack()
+
+    step_label = tk.Label(root, text="Steps: 0", font=("Arial", 14))
+    step_label.pack()
+    score_label = tk.Label(root, text="Score: 0", font=("Arial", 14))
+    score_label.pack()
+    status_label = tk.Label(root, text="", font=("Arial", 14))
+    status_label.pack()
+
+    # Initial draw, with the last trained table if there is one
+    load_table()
+    draw_grid()
+    root.mainloop()
+
+# The window opens only when the script is started, never on import
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Named timing spans and counters for the training and acting loops.
+
+Hot-loop phases are instrumented by wrapping the callables they go
+through, once, outside the loop:
+
+    env_step = instrument.wrap("env.step", env.step)
+    argmax = instrument.wrap("np.argmax", np.argmax)
+
+While profiling is off wrap() hands back the callable itself, so the loop
+runs exactly the code it ran before. Coarser phases (a whole training run,
+one GUI frame) use spans as context managers; a disabled span is a
+do-nothing object, and enable() switches existing spans on in place.
+Callables are bound when wrap() runs, so profiling has to be on before the
+instrumented module is imported: set TAXI_PROFILE=1, or call enable()
+first.
+
+At exit the per-phase report (counts, totals, histogram percentiles) is
+printed, and with TAXI_PROFILE_OUT=file the nested self-times are written
+in the collapsed-stack format that flamegraph.pl and speedscope read.
+"""
+import atexit
+import collections
+import functools
+import os
+import sys
+import time
+
+_spans = {}
+_counters = {}
+_stack = []  # [span, start_ns, child_ns] for every span currently open
+_self_ns = collections.Counter()  # Stack of span names -> time spent in the innermost span itself
+ENABLED = False
+
+
+class _SpanBase:
+    __slots__ = ("name", "count", "total_ns", "hist")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.hist = [0] * 64  # Bucket b counts durations in [2**(b-1), 2**b) ns
+
+
+class _NullSpan(_SpanBase):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span(_SpanBase):
+    __slots__ = ()
+
+    def __enter__(self):
+        _stack.append([self, time.perf_counter_ns(), 0])
+        return self
+
+    def __exit__(self, *exc):
+        frame = _stack.pop()
+        elapsed = time.perf_counter_ns() - frame[1]
+        self.count += 1
+        self.total_ns += elapsed
+        self.hist[min(elapsed.bit_length(), 63)] += 1
+        _self_ns[tuple(f[0].name for f in _stack) + (self.name,)] += elapsed - frame[2]
+        if _stack:
+            _stack[-1][2] += elapsed
+        return False
+
+
+class _CounterBase:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+
+class _NullCounter(_CounterBase):
+    __slots__ = ()
+
+    def add(self, n=1):
+        pass
+
+
+class _Counter(_CounterBase):
+    __slots__ = ()
+
+    def add(self, n=1):
+        self.value += n
+
+
+# Function to get the span with this name (the same object for every call)
+def span(name):
+    if name not in _spans:
+        _spans[name] = (_Span if ENABLED else _NullSpan)(name)
+    return _spans[name]
+
+
+# Function to get the counter with this name (the same object for every call)
+def counter(name):
+    if name not in _counters:
+        _counters[name] = (_Counter if ENABLED else _NullCounter)(name)
+    return _counters[name]
+
+
+# Function to time every call of fn under a span; returns fn itself while profiling is off
+def wrap(name, fn):
+    if not ENABLED:
+        return fn
+    s = span(name)
+
+    @functools.wraps(fn)
+    def timed_call(*args, **kwargs):
+        with s:
+            return fn(*args, **kwargs)
+    return timed_call
+
+
+# Decorator form of wrap()
+def timed(name):
+    return functools.partial(wrap, name)
+
+
+# Function to time step() and reset() of every layer of a gym env, so wrapper overhead shows up per layer
+def wrap_env(env, prefix="env"):
+    if not ENABLED:
+        return env
+    layer = env
+    while layer is not None:
+        kind = type(layer).__name__
+        layer.step = wrap(f"{prefix}.{kind}.step", layer.step)
+        layer.reset = wrap(f"{prefix}.{kind}.reset", layer.reset)
+        layer = getattr(layer, "env", None)
+    return env
+
+
+# Function to switch every span and counter, existing or future, to recording
+def enable():
+    global ENABLED
+    ENABLED = True
+    for s in _spans.values():
+        s.__class__ = _Span
+    for c in _counters.values():
+        c.__class__ = _Counter
+
+
+# Function to switch everything back to no-ops (collected numbers are kept)
+def disable():
+    global ENABLED
+    ENABLED = False
+    for s in _spans.values():
+        s.__class__ = _NullSpan
+    for c in _counters.values():
+        c.__class__ = _NullCounter
+
+
+# Function to clear collected timings and counts
+def reset():
+    for s in _spans.values():
+        s.count = s.total_ns = 0
+        s.hist = [0] * 64
+    for c in _counters.values():
+        c.value = 0
+    _self_ns.clear()
+
+
+# Function to estimate a percentile in microseconds from a span's histogram (bucket upper bound)
+def _percentile_us(hist, count, q):
+    target = q * count
+    seen = 0
+    for bucket, n in enumerate(hist):
+        seen += n
+        if seen >= target:
+            return 2 ** bucket / 1e3
+    return 0.0
+
+
+# Per-phase totals and histogram percentiles, busiest phase first
+def report():
+    phases = {}
+    for s in sorted(_spans.values(), key=lambda s: -s.total_ns):
+        if s.count:
+            phases[s.name] = {
+                "count": s.count,
+                "total_ms": s.total_ns / 1e6,
+                "mean_us": s.total_ns / s.count / 1e3,
+                "p50_us": _percentile_us(s.hist, s.count, 0.5),
+                "p99_us": _percentile_us(s.hist, s.count, 0.99),
+            }
+    counters = {c.name: c.value for c in _counters.values() if c.value}
+    return {"spans": phases, "counters": counters}
+
+
+def print_report(file=sys.stderr):
+    result = report()
+    print(f"{'span':<32}{'count':>10}{'total ms':>14}{'mean us':>14}{'p50 us':>12}{'p99 us':>12}", file=file)
+    for name, s in result["spans"].items():
+        print(f"{name:<32}{s['count']:>10}{s['total_ms']:>14.1f}{s['mean_us']:>14.2f}"
+              f"{s['p50_us']:>12.2f}{s['p99_us']:>12.2f}", file=file)
+    for name, value in result["counters"].items():
+        print(f"{name:<32}{value:>10}", file=file)
+
+
+# Function to write self-times as collapsed stacks ("outer;inner microseconds" per line)
+def export_collapsed(path):
+    with open(path, "w") as f:
+        for stack, ns in sorted(_self_ns.items()):
+            if ns >= 1000:
+                f.write(f"{';'.join(stack)} {ns // 1000}\n")
+
+
+def _at_exit():
+    if not any(s.count for s in _spans.values()):
+        return
+    print_report()
+    out = os.environ.get("TAXI_PROFILE_OUT")
+    if out:
+        export_collapsed(out)
+        print(f"Collapsed stacks written to {out}", file=sys.stderr)
+
+
+if os.environ.get("TAXI_PROFILE", "") not in ("", "0"):
+    enable()
+atexit.register(_at_exit)
@@ -0,0 +1,97 @@
+"""Exact model-based solvers for Taxi-v3 and the obstacle grids.
+
+Both problems are small and deterministic, so the whole model fits in
+(states, actions) arrays and value/policy iteration run as array sweeps.
+The results have the same shape as the tables the scripts and GUIs use.
+"""
+import numpy as np
+
+import grid_world
+import taxi_vec_env
+
+
+# Function to run value iteration on a deterministic (next_state, reward, done) model
+def value_iteration(next_state, reward, done, gamma, theta=1e-8, max_iterations=100000):
+    values = np.zeros(next_state.shape[0])
+    not_done = ~done
+    for _ in range(max_iterations):
+        q_values = reward + gamma * values[next_state] * not_done
+        new_values = q_values.max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < theta:
+            break
+    return reward + gamma * values[next_state] * not_done
+
+
+# Function to run policy iteration on a deterministic (next_state, reward, done) model
+def policy_iteration(next_state, reward, done, gamma, theta=1e-8, max_iterations=1000):
+    num_states = next_state.shape[0]
+    rows = np.arange(num_states)
+    not_done = ~done
+    values = np.zeros(num_states)
+    policy = np.zeros(num_states, dtype=np.int64)
+
+    for _ in range(max_iterations):
+        # Policy evaluation with in-place array sweeps
+        pi_next = next_state[rows, policy]
+        pi_reward = reward[rows, policy]
+        pi_not_done = not_done[rows, policy]
+        while True:
+            new_values = pi_reward + gamma * values[pi_next] * pi_not_done
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta < theta:
+                break
+
+        # Policy improvement; keep the current action on ties so the loop terminates
+        q_values = reward + gamma * values[next_state] * not_done
+        best = q_values.argmax(axis=1)
+        keep = q_values[rows, policy] >= q_values[rows, best] - theta
+        new_policy = np.where(keep, policy, best)
+        if np.array_equal(new_policy, policy):
+            break
+        policy = new_policy
+    return reward + gamma * values[next_state] * not_done
+
+
+# Function to extract the Taxi model, from env.unwrapped.P when an env is given
+def taxi_model(env=None):
+    if env is None:
+        return taxi_vec_env.NEXT_STATE, taxi_vec_env.REWARD.astype(np.float64), taxi_vec_env.DONE
+
+    P = env.unwrapped.P
+    num_states, num_actions = len(P), len(P[0])
+    next_state = np.zeros((num_states, num_actions), dtype=np.int32)
+    reward = np.zeros((num_states, num_actions))
+    done = np.zeros((num_states, num_actions), dtype=bool)
+    for state in range(num_states):
+        for action in range(num_actions):
+            # Taxi-v3 is deterministic: one (prob, next_state, reward, done) entry each
+            _, next_state[state, action], reward[state, action], done[state, action] = P[state][action][0]
+    return next_state, reward, done
+
+
+# Function to solve Taxi-v3 exactly; returns a (500, 6) q_table
+def solve_taxi(env=None, gamma=0.99, method="value"):
+    solver = value_iteration if method == "value" else policy_iteration
+    return solver(*taxi_model(env), gamma)
+
+
+# Function to solve an obstacle grid exactly; returns a (GRID_SIZE, GRID_SIZE, 4) Q_table
+def solve_grid(grid_size, obstacles, goal_pos, gamma=0.9, goal_reward=100, step_reward=-1, method="value"):
+    blocked = grid_world.obstacle_mask(grid_size, obstacles)
+    model = grid_world.grid_model(blocked, goal_pos, goal_reward, step_reward)
+    solver = value_iteration if method == "value" else policy_iteration
+    return solver(*model, gamma).reshape(grid_size, grid_size, grid_world.NUM_ACTIONS)
+
+
+# Function to measure how often a learned table picks an optimal action
+def greedy_agreement(q_table, q_optimal, states=None, tol=1e-6):
+    q_table = q_table.reshape(-1, q_table.shape[-1])
+    q_optimal = q_optimal.reshape(-1, q_optimal.shape[-1])
+    if states is None:
+        states = np.arange(q_table.shape[0])
+    actions = q_table[states].argmax(axis=1)
+    chosen = q_optimal[states, actions]
+    return float(np.mean(chosen >= q_optimal[states].max(axis=1) - tol))
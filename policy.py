@@ -0,0 +1,91 @@
+"""Compiled greedy policies and batched action lookup.
+
+compile_taxi() / compile_grid() turn a Q-table into one compact uint8
+action per state. For grids, moves into walls or off the board are
+masked out first. act() then resolves any number of states with a single
+array index, and action() serves one state from a plain list.
+
+For storage, pack_actions() squeezes the action array down to the fewest
+bits per state that hold every action code (2 for a grid without dead-end
+cells, 3 for Taxi-v3), and unpack_actions() reverses it.
+"""
+import numpy as np
+
+import grid_world
+import sparse_q
+
+NO_ACTION = 255  # Grid cells with no valid move at all
+COMPILE_BLOCK_CELLS = 1 << 16  # Cells per block when compiling a TiledQTable
+
+
+class CompiledPolicy:
+    """Argmax action for every state of a Taxi or grid Q-table."""
+
+    def __init__(self, actions, grid_size=None):
+        self.actions = np.ascontiguousarray(actions, dtype=np.uint8)
+        self.grid_size = grid_size  # None for Taxi-v3, side length for grids
+        self._list = self.actions.tolist()
+
+    # Function to pick actions for many states at once (state indices, or (N, 2) grid positions)
+    def act(self, states):
+        states = np.asarray(states)
+        if self.grid_size is not None and states.ndim == 2:
+            states = states[:, 0] * self.grid_size + states[:, 1]
+        return self.actions[states]
+
+    # Function to pick the action for one state (an int, or an (x, y) tuple on grids)
+    def action(self, state):
+        if self.grid_size is not None and isinstance(state, tuple):
+            state = state[0] * self.grid_size + state[1]
+        return self._list[state]
+
+
+# Function to compile a (500, 6) Taxi q_table
+def compile_taxi(q_table):
+    return CompiledPolicy(np.argmax(q_table, axis=1))
+
+
+# Function to compile a (GRID_SIZE, GRID_SIZE, 4) Q_table (dense or TiledQTable), masking moves into obstacles or off the grid
+def compile_grid(q_table, obstacles=(), mask_invalid=True):
+    grid_size = q_table.shape[0]
+    sparse = isinstance(q_table, sparse_q.TiledQTable)
+    if not mask_invalid:
+        actions = q_table.greedy_actions() if sparse else q_table.reshape(-1, grid_world.NUM_ACTIONS).argmax(axis=1)
+        return CompiledPolicy(actions, grid_size)
+
+    blocked = obstacles if isinstance(obstacles, np.ndarray) else grid_world.obstacle_mask(grid_size, obstacles)
+    if not sparse:
+        _, valid = grid_world.grid_transitions(blocked)
+        actions = np.where(valid, q_table.reshape(-1, grid_world.NUM_ACTIONS), -np.inf).argmax(axis=1)
+        actions[~valid.any(axis=1)] = NO_ACTION
+        return CompiledPolicy(actions, grid_size)
+
+    # Tiled tables are for maps too big for a (cells, 4) valid-move table; build it a block of rows at a time
+    actions = np.empty(grid_size * grid_size, dtype=np.uint8)
+    rows_per_block = max(1, COMPILE_BLOCK_CELLS // grid_size)
+    for row in range(0, grid_size, rows_per_block):
+        cells = np.arange(row * grid_size, min(row + rows_per_block, grid_size) * grid_size)
+        _, valid = grid_world.grid_transitions(blocked, cells)
+        block = np.where(valid, q_table.rows(cells), -np.inf).argmax(axis=1)  # Unwritten cells pick their first valid move
+        block[~valid.any(axis=1)] = NO_ACTION
+        actions[cells] = block
+    return CompiledPolicy(actions, grid_size)
+
+
+# Function to pack an action array into as few bits per state as its codes need; returns (bytes, bits)
+def pack_actions(actions, num_actions):
+    actions = np.asarray(actions, dtype=np.uint8)
+    codes = np.where(actions == NO_ACTION, num_actions, actions).astype(np.uint8)  # NO_ACTION -> num_actions
+    bits = max(1, int(codes.max(initial=0)).bit_length())
+    shifts = np.arange(bits, dtype=np.uint8)
+    bit_matrix = (codes[:, None] >> shifts) & 1
+    return np.packbits(bit_matrix.ravel(), bitorder="little"), bits
+
+
+# Function to unpack count actions written by pack_actions()
+def unpack_actions(packed, bits, count, num_actions):
+    shifts = np.arange(bits, dtype=np.uint8)
+    bit_matrix = np.unpackbits(np.asarray(packed, dtype=np.uint8), count=count * bits, bitorder="little")
+    codes = (bit_matrix.reshape(count, bits) << shifts).sum(axis=1).astype(np.uint8)
+    codes[codes == num_actions] = NO_ACTION
+    return codes
@@ -0,0 +1,235 @@
+"""Local policy-serving daemon.
+
+Loads Q-tables once, compiles them into greedy policies and answers
+"state -> action" queries over a Unix socket or localhost TCP. The wire
+format is newline-delimited JSON:
+
+    {"table": "taxi", "state": 123}          -> {"action": 3}
+    {"table": "grid", "states": [[1, 2], ...]} -> {"actions": [1, ...]}
+    {"cmd": "stats"}                          -> latency p50/p99 and counts
+
+Concurrent requests for the same table are coalesced into micro-batches
+and resolved with a single vectorized lookup. Tables are hot-reloaded
+when their file gets a newer modification time.
+
+    python policy_server.py --table taxi=q_table.qtbl --unix /tmp/taxi_policy.sock
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import socket
+import time
+
+import numpy as np
+
+import qtable_io
+
+
+class ServedTable:
+    """One Q-table file, its compiled policy and its pending queries."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.mtime = None
+        self.policy = None
+        self.queue = asyncio.Queue()
+        self.load()
+
+    # Function to (re)load the table and compile its policy
+    def load(self):
+        self.mtime = os.stat(self.path).st_mtime_ns
+        # Any table or quantize.py export; grid obstacles come from the .qtbl header
+        self.policy = qtable_io.load_policy(self.path)
+
+    # Function to reject states outside the table before lookup (NumPy would wrap negative indices around)
+    def check(self, states):
+        grid_size = self.policy.grid_size
+        positions = grid_size is not None and states.ndim == 2 and states.shape[1] == 2
+        if states.ndim != 1 and not positions:
+            raise ValueError(f"Expected a list of states{' or [x, y] positions' if grid_size else ''}")
+        if states.size == 0:
+            return states.astype(np.int64)
+        if states.dtype.kind not in "iu":
+            raise ValueError("States must be integers")
+        limit = grid_size if positions else len(self.policy.actions)
+        if states.min() < 0 or states.max() >= limit:
+            raise ValueError(f"States must be in [0, {limit}) for table {self.name!r}")
+        return states
+
+    def reload_if_newer(self):
+        try:
+            if os.stat(self.path).st_mtime_ns != self.mtime:
+                self.load()
+                return True
+        except (OSError, ValueError):
+            pass  # Keep serving the old table while a new one is being written
+        return False
+
+
+class PolicyServer:
+    """Serves compiled policies with micro-batched lookups."""
+
+    def __init__(self, tables, batch_window=0.0005, max_batch=4096, reload_interval=1.0):
+        self.tables = {name: ServedTable(name, path) for name, path in tables.items()}
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.reload_interval = reload_interval
+        self.latencies = collections.deque(maxlen=100000)  # Seconds per request, most recent
+        self.requests = 0
+        self.batches = 0
+
+    # Function to answer one table's queries in batches: wait for one, then gather for batch_window
+    async def _batcher(self, table):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await table.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(table.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Flatten every request's states into one lookup, then split the answers back out
+            sizes = [len(states) for states, _ in batch]
+            try:
+                actions = table.policy.act(np.concatenate([states for states, _ in batch])).tolist()
+            except (IndexError, ValueError):
+                # Resolve requests one by one so only the bad ones get the error
+                for states, future in batch:
+                    try:
+                        future.set_result(table.policy.act(states).tolist())
+                    except (IndexError, ValueError) as e:
+                        future.set_exception(e)
+                continue
+            start = 0
+            for size, (_, future) in zip(sizes, batch):
+                if not future.done():
+                    future.set_result(actions[start:start + size])
+                start += size
+            self.batches += 1
+
+    async def _reloader(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            for table in self.tables.values():
+                if table.reload_if_newer():
+                    print(f"Reloaded {table.name} from {table.path}")
+
+    # Function to resolve states for one table through its batcher
+    async def query(self, name, states):
+        table = self.tables[name]
+        future = asyncio.get_running_loop().create_future()
+        await table.queue.put((states, future))
+        return await future
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1e6
+        report = {"requests": self.requests, "batches": self.batches}
+        if latencies.size:
+            report["p50_us"] = float(np.percentile(latencies, 50))
+            report["p99_us"] = float(np.percentile(latencies, 99))
+        return report
+
+    async def _handle(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        if request.get("cmd") == "stats":
+            return self.stats()
+        start = time.perf_counter()
+        single = "state" in request
+        states = np.asarray([request["state"]] if single else request["states"])
+        states = self.tables[request["table"]].check(states)
+        actions = await self.query(request["table"], states)
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return {"action": actions[0]} if single else {"actions": actions}
+
+    async def _client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self._handle(json.loads(line))
+                except (KeyError, ValueError, IndexError, TypeError) as e:
+                    response = {"error": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client hung up mid-request (reset or broken pipe); nobody is left to answer
+        finally:
+            writer.close()
+
+    # Function to serve until cancelled, on a Unix socket path or a localhost port
+    async def serve(self, unix_path=None, host="127.0.0.1", port=8765):
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self._client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self._client, host, port)
+        tasks = [asyncio.create_task(self._batcher(t)) for t in self.tables.values()]
+        tasks.append(asyncio.create_task(self._reloader()))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class PolicyClient:
+    """Small blocking client for simulators."""
+
+    def __init__(self, unix_path=None, host="127.0.0.1", port=8765):
+        if unix_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+
+    def _call(self, request):
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def act(self, table, state):
+        return self._call({"table": table, "state": state})["action"]
+
+    def act_many(self, table, states):
+        return self._call({"table": table, "states": states})["actions"]
+
+    def stats(self):
+        return self._call({"cmd": "stats"})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve greedy actions from Q-tables")
+    parser.add_argument("--table", action="append", default=[], metavar="NAME=PATH",
+                        help="table to serve, e.g. taxi=q_table.qtbl (repeatable)")
+    parser.add_argument("--unix", help="Unix socket path (default: TCP on localhost)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-window-us", type=float, default=500)
+    args = parser.parse_args(argv)
+
+    tables = dict(spec.split("=", 1) for spec in args.table) or {"taxi": qtable_io.DEFAULT_PATH}
+    server = PolicyServer(tables, batch_window=args.batch_window_us / 1e6)
+    print(f"Serving {', '.join(tables)} on {args.unix or f'127.0.0.1:{args.port}'}")
+    try:
+        asyncio.run(server.serve(args.unix, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Binary, memory-mapped Q-table files.
+
+Layout of a .qtbl file:
+    magic  b"QTBL"          4 bytes
+    version                 uint16, little endian
+    header length           uint32, little endian
+    header                  UTF-8 JSON: shape, dtype, env_id,
+                            hyperparameters, training_steps, data_offset
+    padding                 up to a 64-byte boundary
+    data                    raw C-order array bytes
+
+Tables open through np.memmap, so players, evaluators and GUIs read them
+with zero copy and several processes share the same read-only pages.
+q_table.json / q_table.npy files are still read, but only for migration.
+
+Version 2 files hold a compressed export (see quantize.py). The header
+names an encoding and lists "sections" (dtype, shape and offset of each
+64-byte-aligned array) in place of data_offset:
+    int8_rows   codes int8 (shape), per-row scale and offset float16
+    policy      greedy actions packed at `bits` bits per state
+load_q_table() decodes either back into a table with the same greedy
+actions (float64 values for int8_rows, a 0/1 float32 table for policy).
+load_policy() goes straight to a compiled policy: from the int8 codes, or
+for packed policies without building a Q-table at all. Plain float64,
+float32 and float16 tables stay version 1 files.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+import policy
+
+MAGIC = b"QTBL"
+VERSION = 2
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<4sHI")
+
+DEFAULT_PATH = "q_table.qtbl"
+LEGACY_PATH = "q_table.json"
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# Function to write a header and its arrays at the offsets the header records; the file is replaced atomically
+def _write(path, version, header, arrays):
+    tmp_path = f"{path}.tmp"
+    header_bytes = json.dumps(header).encode()
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, version, len(header_bytes)))
+        f.write(header_bytes)
+        for offset, array in arrays:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+# Function to write a Q-table with its header; the file is replaced atomically
+def save_q_table(path, q_table, env_id=None, hyperparameters=None, training_steps=0):
+    q_table = np.ascontiguousarray(q_table)
+    header = {
+        "shape": list(q_table.shape),
+        "dtype": q_table.dtype.str,
+        "env_id": env_id,
+        "hyperparameters": hyperparameters or {},
+        "training_steps": int(training_steps),
+    }
+    # data_offset depends on the header length, so size the header with a placeholder first
+    header["data_offset"] = 0
+    size = _PREFIX.size + len(json.dumps(header).encode()) + 16
+    header["data_offset"] = _align(size)
+    # Plain tables stay version 1, so older readers still open them
+    _write(path, 1, header, [(header["data_offset"], q_table)])
+
+
+# Function to write an encoded export: sections is {name: array}, shape the decoded table's shape
+def save_encoded(path, encoding, shape, sections, env_id=None, hyperparameters=None, training_steps=0, **fields):
+    arrays = {name: np.ascontiguousarray(array) for name, array in sections.items()}
+    header = {
+        "shape": list(shape),
+        "encoding": encoding,
+        "env_id": env_id,
+        "hyperparameters": hyperparameters or {},
+        "training_steps": int(training_steps),
+        **fields,
+        "sections": {name: {"dtype": a.dtype.str, "shape": list(a.shape), "offset": 0} for name, a in arrays.items()},
+    }
+    # Offsets depend on the header length; 16 spare bytes per offset cover the placeholder zeros
+    offset = _align(_PREFIX.size + len(json.dumps(header).encode()) + 16 * len(arrays))
+    for name, array in arrays.items():
+        header["sections"][name]["offset"] = offset
+        offset = _align(offset + array.nbytes)
+    _write(path, VERSION, header, [(header["sections"][name]["offset"], a) for name, a in arrays.items()])
+
+
+# Function to memory-map the sections of a version 2 file
+def _sections(path, header):
+    return {name: np.memmap(path, dtype=np.dtype(info["dtype"]), mode="r", offset=info["offset"],
+                            shape=tuple(info["shape"]))
+            for name, info in header["sections"].items()}
+
+
+# Function to unpack the greedy actions of a "policy" export
+def _packed_actions(path, header):
+    num_actions = header["shape"][-1]
+    count = int(np.prod(header["shape"][:-1]))
+    return policy.unpack_actions(_sections(path, header)["actions"], header["bits"], count, num_actions)
+
+
+# Function to decode a version 2 export into a table with the same greedy actions
+def _decode(path, header):
+    shape = tuple(header["shape"])
+    if header["encoding"] == "int8_rows":
+        # float64, so adjacent codes stay distinct however small a row's scale is next to its offset
+        sections = _sections(path, header)
+        scale = sections["scale"].astype(np.float64)[..., None]
+        offset = sections["offset"].astype(np.float64)[..., None]
+        return sections["codes"] * scale + offset
+    if header["encoding"] == "policy":
+        # Only the argmax was kept: 1 for the greedy action, 0 elsewhere (all 0 where no move is valid)
+        actions = _packed_actions(path, header)
+        table = np.zeros((actions.size, shape[-1]), dtype=np.float32)
+        has_action = actions != policy.NO_ACTION
+        table[np.flatnonzero(has_action), actions[has_action]] = 1
+        return table.reshape(shape)
+    raise ValueError(f"{path} uses unknown encoding {header['encoding']!r}")
+
+
+# Function to read just the header of a .qtbl file
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Q-table file")
+        if version > VERSION:
+            raise ValueError(f"{path} uses format version {version}, newer than {VERSION}")
+        return json.loads(f.read(header_len))
+
+
+# Function to open a Q-table; .qtbl files are memory-mapped, exports decoded, legacy formats read into memory
+def load_q_table(path, mode="r"):
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        header = read_header(path)
+        if "encoding" in header:
+            return _decode(path, header)
+        return np.memmap(path, dtype=np.dtype(header["dtype"]), mode=mode,
+                         offset=header["data_offset"], shape=tuple(header["shape"]))
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode=mode)
+    with open(path, "r") as f:
+        return np.array(json.load(f))
+
+
+# Function to convert a legacy q_table.json / .npy file into the binary format
+def migrate(legacy_path, path=DEFAULT_PATH, **metadata):
+    save_q_table(path, load_q_table(legacy_path), **metadata)
+    return load_q_table(path)
+
+
+# Function to open the binary table, migrating the legacy JSON file if that is all there is
+def open_q_table(path=DEFAULT_PATH, legacy_path=LEGACY_PATH, **metadata):
+    if os.path.exists(path):
+        return load_q_table(path)
+    if legacy_path and os.path.exists(legacy_path):
+        return migrate(legacy_path, path, **metadata)
+    return None
+
+
+# Function to load any table file as a compiled greedy policy; grid obstacles default to the header's
+def load_policy(path, obstacles=None):
+    header = read_header(path) if path.endswith(".qtbl") else {"shape": None, "hyperparameters": {}}
+    if obstacles is None:
+        obstacles = {tuple(o) for o in header["hyperparameters"].get("obstacles", [])}
+    if header.get("encoding") == "policy":
+        shape = header["shape"]
+        return policy.CompiledPolicy(_packed_actions(path, header), shape[0] if len(shape) == 3 else None)
+    if header.get("encoding") == "int8_rows":
+        q_table = _sections(path, header)["codes"]  # Scale is positive per row, so codes rank like values
+    else:
+        q_table = load_q_table(path)
+    if q_table.ndim == 3:
+        return policy.compile_grid(q_table, obstacles)
+    return policy.compile_taxi(q_table)
@@ -0,0 +1,159 @@
+"""Quantized Q-table and policy exports for deployment.
+
+Training keeps float64 tables, but playing only needs the greedy action
+of each state. An export rewrites a .qtbl file in a smaller encoding:
+
+    float32 / float16   plain tables at lower precision
+    int8                int8 codes per row, with a float16 scale and offset
+                        per row (code * scale + offset)
+    policy              only the greedy actions, packed at 2 bits per grid
+                        cell (3 with dead-end cells) or 3 per Taxi-v3 state
+
+Rounding never reorders a row, but it can turn a near-tie into an exact
+tie in front of the greedy action. Where that happens, the tied values are
+lowered by one step, so the deployed policy is unchanged: plain argmax for
+Taxi-v3, and argmax over valid moves (compile_grid()) for grids. Every
+export is then reloaded and its greedy actions checked against the source
+table, and a mismatch fails the export.
+
+    python quantize.py q_table.qtbl q_table.policy.qtbl --format policy
+"""
+import argparse
+import os
+
+import numpy as np
+
+import grid_world
+import policy
+import qtable_io
+
+ENCODINGS = ("float32", "float16", "int8", "policy")
+
+
+# Function to get the valid-move mask the deployed policy uses (None for Taxi-v3, where every action is valid)
+def _valid_moves(q_table, obstacles):
+    if q_table.ndim != 3:
+        return None
+    _, valid = grid_world.grid_transitions(grid_world.obstacle_mask(q_table.shape[0], obstacles))
+    return valid
+
+
+# Function to compute the deployed greedy action of every state of a table
+def deployed_actions(q_table, obstacles=()):
+    if q_table.ndim == 3:
+        return policy.compile_grid(q_table, obstacles).actions
+    return policy.compile_taxi(q_table).actions
+
+
+# Function to lower any value tied with a row's greedy action in front of it; values is (states, actions)
+def _repair_ties(values, expected, valid, lower):
+    candidates = values.astype(np.float64)
+    if valid is not None:
+        candidates = np.where(valid, candidates, -np.inf)
+    has_action = expected != policy.NO_ACTION
+    rows = np.flatnonzero(has_action & (candidates.argmax(axis=1) != expected))
+    if rows.size == 0:
+        return 0
+    sub = values[rows]
+    top = sub[np.arange(rows.size), expected[rows]]
+    # Rounding keeps order, so the greedy value is still the row's valid maximum; only exact ties remain
+    tied = sub == top[:, None]
+    tied[np.arange(rows.size), expected[rows]] = False
+    if valid is not None:
+        tied &= valid[rows]
+    sub[tied] = lower(np.broadcast_to(top[:, None], sub.shape)[tied])
+    values[rows] = sub
+    return rows.size
+
+
+# Function to quantize each row to int8 codes; returns (codes, scale, offset)
+def quantize_rows(q_rows):
+    low, high = q_rows.min(axis=1), q_rows.max(axis=1)
+    offset = ((high + low) / 2).astype(np.float16)
+    scale = ((high - low) / 254).astype(np.float16)
+    # A spread too small for a float16 step still needs a positive scale to keep the codes apart
+    scale[(scale == 0) & (high > low)] = np.finfo(np.float16).smallest_subnormal
+    safe_scale = np.where(scale > 0, scale, 1).astype(np.float64)
+    codes = np.rint((q_rows - offset[:, None]) / safe_scale[:, None])
+    return np.clip(codes, -127, 127).astype(np.int8), scale, offset
+
+
+# Function to encode a table; returns (encoding name for the header, {section: array}, extra header fields)
+def encode(q_table, encoding, obstacles=()):
+    q_table = np.asarray(q_table, dtype=np.float64)
+    num_actions = q_table.shape[-1]
+    q_rows = q_table.reshape(-1, num_actions)
+    valid = _valid_moves(q_table, obstacles)
+    expected = deployed_actions(q_table, obstacles)
+
+    if encoding in ("float32", "float16"):
+        dtype = np.dtype(encoding)
+        values = np.clip(q_rows, np.finfo(dtype).min, np.finfo(dtype).max).astype(dtype)
+        _repair_ties(values, expected, valid, lambda v: np.nextafter(v, dtype.type(-np.inf)))
+        return None, {"table": values.reshape(q_table.shape)}, {}
+    if encoding == "int8":
+        codes, scale, offset = quantize_rows(q_rows)
+        _repair_ties(codes, expected, valid, lambda v: v - 1)
+        shape = q_table.shape[:-1]
+        return "int8_rows", {"codes": codes.reshape(q_table.shape), "scale": scale.reshape(shape),
+                             "offset": offset.reshape(shape)}, {}
+    if encoding == "policy":
+        packed, bits = policy.pack_actions(expected, num_actions)
+        return "policy", {"actions": packed}, {"bits": bits}
+    raise ValueError(f"Unknown encoding {encoding!r}; expected one of {ENCODINGS}")
+
+
+# Function to compare an exported file's greedy actions with the source table; returns the mismatch count
+# Both ways of loading it are checked: load_policy(), and compiling the table load_q_table() decodes
+def verify(q_table, path, obstacles=()):
+    expected = deployed_actions(np.asarray(q_table), obstacles)
+    served = qtable_io.load_policy(path, obstacles).actions
+    decoded = deployed_actions(np.asarray(qtable_io.load_q_table(path)), obstacles)
+    return int(((expected != served) | (expected != decoded)).sum())
+
+
+# Function to export a .qtbl table in a smaller encoding and verify it; returns a size and check report
+def export(source_path, path, encoding, obstacles=None):
+    header = qtable_io.read_header(source_path)
+    q_table = np.asarray(qtable_io.load_q_table(source_path))
+    if obstacles is None:
+        obstacles = {tuple(o) for o in header["hyperparameters"].get("obstacles", [])}
+    name, sections, fields = encode(q_table, encoding, obstacles)
+
+    metadata = {"env_id": header.get("env_id"), "hyperparameters": header.get("hyperparameters"),
+                "training_steps": header.get("training_steps", 0)}
+    if name is None:
+        qtable_io.save_q_table(path, sections["table"], **metadata)
+    else:
+        qtable_io.save_encoded(path, name, q_table.shape, sections, **metadata, **fields)
+
+    mismatches = verify(q_table, path, obstacles)
+    if mismatches:
+        raise ValueError(f"{path}: {mismatches} states changed greedy action in the {encoding} export")
+    payload = sum(array.nbytes for array in sections.values())
+    return {
+        "encoding": encoding,
+        "states": int(np.prod(q_table.shape[:-1])),
+        "source_bytes": int(q_table.nbytes),
+        "export_bytes": int(payload),
+        "file_bytes": os.path.getsize(path),
+        "ratio": q_table.nbytes / payload,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="float .qtbl table to export")
+    parser.add_argument("path", help="file to write")
+    parser.add_argument("--format", choices=ENCODINGS, default="policy")
+    args = parser.parse_args(argv)
+
+    report = export(args.source, args.path, args.format)
+    print(f"{args.path}: {report['encoding']}, {report['states']} states, "
+          f"{report['source_bytes']} -> {report['export_bytes']} bytes ({report['ratio']:.1f}x smaller), "
+          f"greedy actions identical")
+
+
+if __name__ == "__main__":
+    main()
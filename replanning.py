@@ -0,0 +1,126 @@
+"""Incremental re-planning for the obstacle grid.
+
+Toggling an obstacle or moving the goal only changes the Bellman backups
+of a few cells. IncrementalPlanner repairs the Q-table with prioritized
+sweeping from those cells: it backs up the cell with the largest pending
+change first and pushes its neighbours only while the change stays above
+a threshold, so one edit costs work proportional to the area it affects.
+Moving the goal changes every value on the map, so that case (and any
+sweep that grows past the map size) falls back to one array-swept solve.
+"""
+import heapq
+
+import numpy as np
+
+import grid_world
+import planning
+
+
+class IncrementalPlanner:
+    """Keeps a (GRID_SIZE, GRID_SIZE, 4) Q-table consistent with map edits.
+
+    The table is updated in place. Without a q_table the map is solved
+    exactly first.
+    """
+
+    def __init__(self, grid_size, obstacles, goal_pos, gamma=0.9, goal_reward=100, step_reward=-1,
+                 q_table=None, theta=1e-3):
+        self.grid_size = grid_size
+        self.gamma = gamma
+        self.goal_reward = goal_reward
+        self.step_reward = step_reward
+        self.theta = theta
+        self.blocked = grid_world.obstacle_mask(grid_size, obstacles)
+        self.goal = goal_pos[0] * grid_size + goal_pos[1]
+
+        if q_table is None:
+            q_table = planning.solve_grid(grid_size, obstacles, goal_pos, gamma, goal_reward, step_reward)
+        self.q_table = q_table
+        self.q = q_table.reshape(-1, grid_world.NUM_ACTIONS)
+        self.values = self.q.max(axis=1)
+        self.values[self.goal] = 0
+
+        self.queue = []
+        self.stale = False  # Set when the next repair needs a full solve
+        self.updates = 0  # Backups performed by the last repair()
+
+    # Function to list a cell and its in-bounds neighbours (everything whose backup reads it)
+    def _neighbourhood(self, cell):
+        x, y = divmod(cell, self.grid_size)
+        cells = [cell]
+        for dx, dy in grid_world.ACTIONS:
+            nx, ny = x - dx, y - dy
+            if 0 <= nx < self.grid_size and 0 <= ny < self.grid_size:
+                cells.append(nx * self.grid_size + ny)
+        return cells
+
+    # Function to recompute one cell's Q-row from its neighbours' values
+    def _backup(self, cell):
+        if cell == self.goal:
+            self.q[cell] = 0
+            return 0.0
+        x, y = divmod(cell, self.grid_size)
+        row = self.q[cell]
+        for action, (dx, dy) in enumerate(grid_world.ACTIONS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.grid_size and 0 <= ny < self.grid_size and not self.blocked[nx, ny]:
+                target = nx * self.grid_size + ny
+            else:
+                target = cell  # Invalid moves leave the agent in place
+            if target == self.goal:
+                row[action] = self.goal_reward
+            else:
+                row[action] = self.step_reward + self.gamma * self.values[target]
+        return row.max()
+
+    def _push(self, cells, priority):
+        for cell in cells:
+            heapq.heappush(self.queue, (-priority, cell))
+
+    # Function to toggle an obstacle and queue the cells whose backups changed
+    def toggle_obstacle(self, pos):
+        x, y = pos
+        self.blocked[x, y] = not self.blocked[x, y]
+        self._push(self._neighbourhood(x * self.grid_size + y), np.inf)
+
+    # Function to move the goal; every value depends on it, so the next repair re-solves
+    def set_goal(self, pos):
+        self.goal = pos[0] * self.grid_size + pos[1]
+        self.stale = True
+
+    # Function to re-solve the whole map in place with array-swept value iteration
+    def _solve(self):
+        model = grid_world.grid_model(self.blocked, divmod(self.goal, self.grid_size), self.goal_reward, self.step_reward)
+        self.q[:] = planning.value_iteration(*model, self.gamma)
+        self.values = self.q.max(axis=1)
+        self.queue.clear()
+        self.stale = False
+
+    # Function to run prioritized sweeping until pending changes fall below theta
+    def repair(self, max_updates=None):
+        # Past roughly one backup per cell a full array solve is cheaper than sweeping on
+        if max_updates is None:
+            max_updates = self.blocked.size
+        self.updates = 0
+        if self.stale:
+            self._solve()
+            return self.updates
+        while self.queue:
+            priority, cell = heapq.heappop(self.queue)
+            if -priority < self.theta:
+                self.queue.clear()
+                break
+            if self.updates >= max_updates:
+                self._solve()
+                break
+            self.updates += 1
+
+            x, y = divmod(cell, self.grid_size)
+            if self.blocked[x, y]:
+                continue
+            new_value = self._backup(cell)
+            change = abs(new_value - self.values[cell])
+            self.values[cell] = new_value
+            if change >= self.theta:
+                self._push(self._neighbourhood(cell), change)
+        return self.updates
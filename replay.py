@@ -0,0 +1,133 @@
+"""Experience replay for the Taxi Q-learning loops.
+
+Instead of one scalar Bellman update per env.step(), transitions go into a
+fixed-capacity ring buffer, and the Q-table learns from minibatches sampled
+out of it. Each minibatch is one array update, so the interpreter cost is
+paid per batch instead of per transition, and each transition is reused
+many times.
+
+The buffer is a set of typed columns (uint16 states, uint8 actions, int8
+rewards, bool done): 7 bytes per transition, so a million transitions fit
+in 7 MB. Sampling is uniform, or proportional to |TD error| ** alpha with
+importance-sampling weights (prioritized replay). In a minibatch that
+repeats a (state, action) pair, the copies share their mean TD error, as
+in the batched trainers, instead of the last write winning.
+"""
+import numpy as np
+
+import sparse_q
+
+COLUMNS = {
+    "state": np.uint16,
+    "action": np.uint8,
+    "reward": np.int8,
+    "next_state": np.uint16,
+    "done": np.bool_,
+}
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring of transitions in typed NumPy columns."""
+
+    def __init__(self, capacity, prioritized=False, alpha=0.6, beta=0.4, min_priority=1e-3, columns=COLUMNS):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.state, self.action, self.reward, self.next_state, self.done = self.columns.values()
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.min_priority = min_priority
+        self.priority = np.zeros(capacity) if prioritized else None  # Stored as |TD error| ** alpha
+        self.max_priority = 1.0  # New transitions get the largest priority seen, so each is replayed soon
+        self.size = 0
+        self.pos = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    # Function to append one transition, overwriting the oldest once the ring is full
+    def add(self, state, action, reward, next_state, done):
+        pos = self.pos
+        self.state[pos] = state
+        self.action[pos] = action
+        self.reward[pos] = reward
+        self.next_state[pos] = next_state
+        self.done[pos] = done
+        if self.prioritized:
+            self.priority[pos] = self.max_priority
+        self.pos = (pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    # Function to append a batch of transitions, e.g. one step of every vectorized env
+    def add_many(self, states, actions, rewards, next_states, dones):
+        n = len(states)
+        if n > self.capacity:
+            raise ValueError(f"Batch of {n} transitions does not fit a ring of {self.capacity}")
+        slots = (self.pos + np.arange(n)) % self.capacity
+        for column, values in zip(self.columns.values(), (states, actions, rewards, next_states, dones)):
+            column[slots] = values
+        if self.prioritized:
+            self.priority[slots] = self.max_priority
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    # Function to draw n slots; returns (slots, importance weights or None)
+    def sample(self, n, generator):
+        if not self.prioritized:
+            return generator.integers(0, self.size, n), None
+        # Stratified proportional sampling: one uniform draw inside each of n equal slices of the mass
+        cdf = np.cumsum(self.priority[:self.size])
+        total = cdf[-1]
+        targets = (np.arange(n) + generator.random(n)) * (total / n)
+        slots = np.minimum(np.searchsorted(cdf, targets, side="right"), self.size - 1)
+        weights = (self.size * self.priority[slots] / total) ** -self.beta
+        return slots, weights / weights.max()
+
+    # Function to set new priorities for sampled slots from their TD errors
+    def update_priorities(self, slots, td_error):
+        priority = (np.abs(td_error) + self.min_priority) ** self.alpha
+        self.priority[slots] = priority
+        self.max_priority = max(self.max_priority, float(priority.max()))
+
+    # Function to gather the columns of some slots as (states, actions, rewards, next_states, dones)
+    def batch(self, slots):
+        return tuple(column[slots] for column in self.columns.values())
+
+    def get_state(self):
+        state = {"size": self.size, "pos": self.pos, "max_priority": self.max_priority,
+                 "columns": {name: column[:self.size] for name, column in self.columns.items()}}
+        if self.prioritized:
+            state["priority"] = self.priority[:self.size]
+        return state
+
+    def set_state(self, state):
+        self.size, self.pos, self.max_priority = state["size"], state["pos"], state["max_priority"]
+        for name, column in self.columns.items():
+            column[:self.size] = state["columns"][name]
+        if self.prioritized:
+            self.priority[:self.size] = state["priority"]
+
+
+# Function to apply one minibatch of TD updates to a (states, actions) q_table in place; returns the TD errors
+def td_update(q_table, states, actions, rewards, next_states, dones, learning_rate, discount_rate, weights=None):
+    if not q_table.flags.c_contiguous or q_table.dtype != np.float64:
+        raise ValueError("td_update needs a contiguous float64 q_table to update in place")
+    _, _, q_get, q_add = sparse_q.accessors(q_table, q_table.shape[1])
+    idx = states.astype(np.int64) * q_table.shape[1] + actions
+    target = rewards + discount_rate * q_table[next_states].max(axis=1) * ~dones
+    td_error = target - q_get(idx)
+    sparse_q.td_apply(q_add, idx, td_error if weights is None else weights * td_error, learning_rate)
+    return td_error
+
+
+# Function to sample one minibatch from buffer and learn from it; returns the TD errors
+def replay_step(q_table, buffer, batch_size, learning_rate, discount_rate, generator):
+    slots, weights = buffer.sample(batch_size, generator)
+    td_error = td_update(q_table, *buffer.batch(slots), learning_rate, discount_rate, weights)
+    if buffer.prioritized:
+        buffer.update_priorities(slots, td_error)
+    return td_error
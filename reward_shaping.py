@@ -0,0 +1,63 @@
+"""Precomputed reward-shaping tables for the obstacle grids.
+
+calculate_reward() in import pygame.py measures two Euclidean distances
+and tests the obstacle set on every transition. The reward only depends on
+(cell, action) for a fixed goal and obstacle map, so reward_table()
+computes it once for every pair and the trainers index into a (cells, 4)
+array instead.
+
+Distances to the goal come from one of POTENTIALS: "euclidean",
+"manhattan" or "bfs" (obstacle-aware shortest path). Two modes use them:
+
+    "toward"    calculate_reward()'s rule: +2 for getting closer, -2 otherwise
+    "potential" potential-based shaping, step_reward + gamma * phi(s') - phi(s)
+                with phi = -distance, which leaves the optimal policy unchanged
+"""
+import numpy as np
+
+import distance_fields
+import grid_world
+
+POTENTIALS = ("euclidean", "manhattan", "bfs")
+
+
+# Function to compute each cell's distance to goal_pos with the named metric
+def goal_distance(blocked, goal_pos, kind="euclidean"):
+    grid_size = blocked.shape[0]
+    x, y = np.divmod(np.arange(grid_size * grid_size), grid_size)
+    dx, dy = x - goal_pos[0], y - goal_pos[1]
+    if kind == "euclidean":
+        return np.sqrt(dx * dx + dy * dy)
+    if kind == "manhattan":
+        return (np.abs(dx) + np.abs(dy)).astype(np.float64)
+    if kind == "bfs":
+        dist = distance_fields.distance_field(blocked, goal_pos).astype(np.float64)
+        dist[dist == distance_fields.UNREACHABLE] = grid_size * grid_size  # Walled-off cells look far away
+        return dist
+    raise ValueError(f"Unknown distance {kind!r}; expected one of {POTENTIALS}")
+
+
+# Function to build the (cells, 4) reward for taking each action in each cell
+def reward_table(blocked, goal_pos, kind="euclidean", mode="toward", gamma=0.9, step_reward=-1,
+                 goal_bonus=5, toward=2, away=-2, obstacle_penalty=-10):
+    grid_size = blocked.shape[0]
+    cells = np.arange(grid_size * grid_size)
+    dist = goal_distance(blocked, goal_pos, kind)
+
+    # Where each move lands before the obstacle check: off-grid moves stay put, obstacle cells are entered
+    x, y = np.divmod(cells, grid_size)
+    tx = x[:, None] + grid_world.ACTIONS[:, 0]
+    ty = y[:, None] + grid_world.ACTIONS[:, 1]
+    in_bounds = (tx >= 0) & (tx < grid_size) & (ty >= 0) & (ty < grid_size)
+    target = np.where(in_bounds, tx * grid_size + ty, cells[:, None])
+    at_goal = target == goal_pos[0] * grid_size + goal_pos[1]
+
+    if mode == "toward":
+        closer = dist[target] < dist[:, None]
+        reward = step_reward + np.where(at_goal, goal_bonus, np.where(closer, toward, away))
+    elif mode == "potential":
+        next_phi = np.where(at_goal, 0.0, -dist[target])  # The goal is terminal
+        reward = step_reward + np.where(at_goal, goal_bonus, 0) + gamma * next_phi + dist[:, None]
+    else:
+        raise ValueError(f"Unknown shaping mode {mode!r}; expected 'toward' or 'potential'")
+    return reward + np.where(blocked.ravel()[target], obstacle_penalty, 0)
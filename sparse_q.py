@@ -0,0 +1,184 @@
+"""Lazily allocated, tiled Q-storage for large grid maps.
+
+A dense (GRID_SIZE, GRID_SIZE, 4) float64 Q_table costs 32 bytes per cell
+whether or not the cell is ever visited. TiledQTable splits the map into
+square tiles and only allocates a tile the first time one of its cells is
+written, so memory follows the explored area instead of the map area.
+Unwritten cells read as zeros, the same as a fresh np.zeros table.
+
+It supports the indexing the scripts use (Q_table[x, y] for a row,
+Q_table[x, y, a] to read or write one value) plus batched rows()/get()/
+add()/set() on flat cell indices for grid_trainer. column() lays out other
+per-(cell, action) data the same way, for the Dyna-Q model.
+"""
+import numpy as np
+
+import grid_world
+
+
+class TiledQTable:
+    """(grid_size, grid_size, num_actions) Q-values stored in lazily allocated tiles."""
+
+    def __init__(self, grid_size, num_actions=grid_world.NUM_ACTIONS, tile_size=32, dtype=np.float64, fill=0):
+        self.grid_size = grid_size
+        self.num_actions = num_actions
+        self.tile_size = tile_size
+        self.dtype = np.dtype(dtype)
+        self.fill = fill  # What unwritten cells read as
+        self.tiles_per_side = -(-grid_size // tile_size)
+        # Tile id -> slot in the pool, or -1 while the tile is unallocated
+        self.directory = np.full(self.tiles_per_side ** 2, -1, dtype=np.int32)
+        self.pool = np.zeros((0, tile_size * tile_size, num_actions), dtype=self.dtype)
+        self.num_tiles = 0
+
+    @property
+    def shape(self):
+        return (self.grid_size, self.grid_size, self.num_actions)
+
+    # Function to map flat cell indices (x * grid_size + y) to (tile id, offset inside the tile)
+    def _locate(self, cells):
+        x, y = np.divmod(np.asarray(cells), self.grid_size)
+        tile_x, off_x = np.divmod(x, self.tile_size)
+        tile_y, off_y = np.divmod(y, self.tile_size)
+        return tile_x * self.tiles_per_side + tile_y, off_x * self.tile_size + off_y
+
+    # Function to allocate any missing tiles, growing the pool by doubling
+    def _allocate(self, tile_ids):
+        missing = np.unique(tile_ids[self.directory[tile_ids] < 0])
+        if missing.size == 0:
+            return
+        needed = self.num_tiles + missing.size
+        if needed > len(self.pool):
+            pool = np.full((max(needed, 2 * len(self.pool)),) + self.pool.shape[1:], self.fill, dtype=self.dtype)
+            pool[:self.num_tiles] = self.pool[:self.num_tiles]
+            self.pool = pool
+        self.directory[missing] = np.arange(self.num_tiles, needed)
+        self.num_tiles = needed
+
+    # Function to read the Q-value rows of many cells; unallocated cells read as fill
+    def rows(self, cells):
+        tile_ids, offsets = self._locate(cells)
+        slots = self.directory[tile_ids]
+        if self.num_tiles == 0:
+            return np.full((slots.size, self.num_actions), self.fill, dtype=self.dtype)
+        rows = self.pool[np.maximum(slots, 0), offsets]
+        rows[slots < 0] = self.fill
+        return rows
+
+    # Function to read values at flat indices cell * num_actions + action
+    def get(self, idx):
+        cells, actions = np.divmod(np.asarray(idx), self.num_actions)
+        return self.rows(cells)[np.arange(cells.size), actions]
+
+    # Function to add delta at distinct flat indices cell * num_actions + action
+    def add(self, idx, delta):
+        cells, actions = np.divmod(np.asarray(idx), self.num_actions)
+        tile_ids, offsets = self._locate(cells)
+        self._allocate(tile_ids)
+        self.pool[self.directory[tile_ids], offsets, actions] += delta
+
+    # Function to write values at flat indices cell * num_actions + action (the last write wins on repeats)
+    def set(self, idx, values):
+        cells, actions = np.divmod(np.asarray(idx), self.num_actions)
+        tile_ids, offsets = self._locate(cells)
+        self._allocate(tile_ids)
+        self.pool[self.directory[tile_ids], offsets, actions] = values
+
+    def __getitem__(self, key):
+        x, y = key[0], key[1]
+        row = self.rows(np.array([x * self.grid_size + y]))[0]
+        return row if len(key) == 2 else row[key[2]]
+
+    def __setitem__(self, key, value):
+        x, y = key[0], key[1]
+        tile_ids, offsets = self._locate(np.array([x * self.grid_size + y]))
+        self._allocate(tile_ids)
+        row = self.pool[self.directory[tile_ids[0]], offsets[0]]
+        if len(key) == 2:
+            row[:] = value
+        else:
+            row[key[2]] = value
+
+    # Function to compute the argmax action of every cell, tile by tile (unwritten cells pick action 0)
+    def greedy_actions(self):
+        actions = np.zeros(self.grid_size * self.grid_size, dtype=np.uint8)
+        for tile_id in np.flatnonzero(self.directory >= 0):
+            tile_cells, in_tile = self._tile_cells(tile_id)
+            actions[tile_cells] = self.pool[self.directory[tile_id], in_tile].argmax(axis=1)
+        return actions
+
+    # Function to list the flat cell indices covered by a tile and their offsets inside it
+    def _tile_cells(self, tile_id):
+        tile_x, tile_y = divmod(int(tile_id), self.tiles_per_side)
+        off_x, off_y = np.divmod(np.arange(self.tile_size * self.tile_size), self.tile_size)
+        x, y = tile_x * self.tile_size + off_x, tile_y * self.tile_size + off_y
+        inside = (x < self.grid_size) & (y < self.grid_size)
+        return x[inside] * self.grid_size + y[inside], np.flatnonzero(inside)
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=self.dtype)
+        flat = dense.reshape(-1, self.num_actions)
+        for tile_id in np.flatnonzero(self.directory >= 0):
+            tile_cells, in_tile = self._tile_cells(tile_id)
+            flat[tile_cells] = self.pool[self.directory[tile_id], in_tile]
+        return dense
+
+    @classmethod
+    def from_dense(cls, q_table, tile_size=32):
+        table = cls(q_table.shape[0], q_table.shape[2], tile_size, q_table.dtype)
+        flat = q_table.reshape(-1, q_table.shape[2])
+        written = np.flatnonzero(flat.any(axis=1))
+        if written.size:
+            tile_ids, offsets = table._locate(written)
+            table._allocate(tile_ids)
+            table.pool[table.directory[tile_ids], offsets] = flat[written]
+        return table
+
+    @property
+    def nbytes(self):
+        return self.pool.nbytes + self.directory.nbytes
+
+    # Memory actually held versus a dense table of the same shape
+    def footprint(self):
+        dense = int(np.prod(self.shape)) * self.dtype.itemsize
+        return {
+            "allocated_tiles": self.num_tiles,
+            "total_tiles": self.directory.size,
+            "bytes": self.nbytes,
+            "dense_bytes": dense,
+            "ratio": self.nbytes / dense,
+        }
+
+
+# Function to make a per-(state, action) column with (get, set) on flat indices, e.g. for the Dyna-Q model:
+# tiles laid out like the TiledQTable tiles when given (so it too only holds the explored area), else a flat array
+def column(size, dtype, fill, tiles=None):
+    if tiles is not None:
+        table = TiledQTable(tiles.grid_size, tiles.num_actions, tiles.tile_size, dtype, fill)
+        return table.get, table.set
+    array = np.full(size, fill, dtype=dtype)
+    return array.__getitem__, array.__setitem__
+
+
+# Function to apply a batch of TD errors through q_add (see accessors()); a (state, action) pair that
+# appears more than once in the batch moves by its mean TD error, rather than the last write winning
+def td_apply(q_add, idx, td_error, learning_rate):
+    touched, slot = np.unique(idx, return_inverse=True)
+    q_add(touched, learning_rate * np.bincount(slot, weights=td_error) / np.bincount(slot))
+
+
+# Function to get (q_table, rows, get, add) accessors on flat (cell * num_actions + action) indices,
+# for either a TiledQTable or a dense array (made contiguous float64 so updates land in place)
+def accessors(q_table, num_actions):
+    if isinstance(q_table, TiledQTable):
+        return q_table, q_table.rows, q_table.get, q_table.add
+    q_table = np.ascontiguousarray(q_table, dtype=np.float64)
+    q_flat = q_table.reshape(-1)
+
+    def q_get(idx):
+        return q_flat[idx]
+
+    def q_add(idx, delta):
+        q_flat[idx] += delta
+
+    return q_table, q_table.reshape(-1, num_actions).__getitem__, q_get, q_add
@@ -0,0 +1,122 @@
+"""Parallel hyperparameter sweeps for Taxi Q-learning.
+
+Spreads a grid or random search over a process pool, one seeded run per
+task, using the batched trainer in taxi_vec_env. Each run's
+rewards_all_episodes curve and final Q-table go into one compressed .npz
+results store, and configurations are ranked by how soon the moving
+average reward reaches a threshold.
+"""
+import itertools
+import json
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+import taxi_vec_env
+
+# Same defaults as the module-level constants in the Taxi scripts
+DEFAULT_SPACE = {
+    "learning_rate": [0.05, 0.1, 0.2, 0.4],
+    "discount_rate": [0.9, 0.95, 0.99],
+    "exploration_decay_rate": [0.0005, 0.001, 0.005],
+}
+
+
+# Function to expand {name: [values]} into every combination
+def grid_search(space):
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+# Function to draw configurations at random; lists are choices, (low, high) tuples are uniform ranges
+def random_search(space, num_configs, seed=None):
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(num_configs):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                config[name] = float(rng.uniform(*values))
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.append(config)
+    return configs
+
+
+# Function to find the first episode where the moving average reward reaches threshold
+def time_to_threshold(rewards, threshold, window=100):
+    if len(rewards) < window:
+        return None
+    moving_avg = np.convolve(rewards, np.ones(window) / window, mode="valid")
+    reached = np.flatnonzero(moving_avg >= threshold)
+    return int(reached[0]) + window if reached.size else None
+
+
+# Function run in each worker: one seeded training run
+def _run(task):
+    config, seed = task
+    start = time.perf_counter()
+    q_table, rewards = taxi_vec_env.train_q_learning(seed=seed, **config)
+    return config, seed, rewards, q_table, time.perf_counter() - start
+
+
+# Function to run every configuration on a process pool and rank them by time-to-threshold
+def run_sweep(configs, threshold=7.0, window=100, seeds_per_config=1, seed=0, processes=None, path=None):
+    seed_seq = np.random.SeedSequence(seed)
+    run_seeds = [int(s.generate_state(1)[0]) for s in seed_seq.spawn(len(configs) * seeds_per_config)]
+    tasks = [(config, run_seeds[i * seeds_per_config + j])
+             for i, config in enumerate(configs) for j in range(seeds_per_config)]
+
+    with mp.Pool(processes) as pool:
+        runs = pool.map(_run, tasks, chunksize=1)
+
+    results = []
+    for config, run_seed, rewards, q_table, seconds in runs:
+        results.append({
+            "config": config,
+            "seed": run_seed,
+            "episodes_to_threshold": time_to_threshold(rewards, threshold, window),
+            "final_avg_reward": float(np.mean(rewards[-window:])),
+            "seconds": seconds,
+            "rewards": rewards,
+            "q_table": q_table,
+        })
+    # Runs that never reach the threshold rank last, best final reward first among them
+    results.sort(key=lambda r: (r["episodes_to_threshold"] is None,
+                                r["episodes_to_threshold"] or 0, -r["final_avg_reward"]))
+    if path is not None:
+        save_results(path, results)
+    return results
+
+
+# Function to write results as one compressed .npz: curves as int16, Q-tables as float32.
+# Sweeping num_episodes gives curves of different lengths, so they are zero-padded to the longest
+# and each run's length is stored next to them.
+def save_results(path, results):
+    summary = [{k: v for k, v in r.items() if k not in ("rewards", "q_table")} for r in results]
+    lengths = np.array([len(r["rewards"]) for r in results], dtype=np.int64)
+    rewards = np.zeros((len(results), lengths.max(initial=0)), dtype=np.int16)
+    for row, r in zip(rewards, results):
+        row[:len(r["rewards"])] = r["rewards"]
+    np.savez_compressed(
+        path,
+        summary=json.dumps(summary),
+        rewards=rewards,
+        lengths=lengths,
+        q_tables=np.array([r["q_table"] for r in results], dtype=np.float32),
+    )
+
+
+# Function to read a results store back as (summary, rewards, q_tables); rewards is one curve per run
+def load_results(path):
+    with np.load(path) as data:
+        rewards = data["rewards"]
+        lengths = data["lengths"] if "lengths" in data.files else [rewards.shape[1]] * len(rewards)
+        return json.loads(str(data["summary"])), [row[:n] for row, n in zip(rewards, lengths)], data["q_tables"]
+
+if __name__ == "__main__":
+    results = run_sweep(grid_search(DEFAULT_SPACE), path="sweep_results.npz")
+    print("Rank | episodes to threshold | final avg reward | config")
+    for rank, r in enumerate(results, 1):
+        print(rank, "|", r["episodes_to_threshold"], "|", round(r["final_avg_reward"], 2), "|", r["config"])
@@ -0,0 +1,184 @@
+"""Command-line entry point: train, play, evaluate and gui.
+
+    python taxi_cli.py train [--episodes 10000] [--planning-steps 0]
+    python taxi_cli.py play [--table q_table.qtbl] [--episodes 3]
+    python taxi_cli.py evaluate [--table q_table.qtbl]
+    python taxi_cli.py gui {taxi,movement,tk}
+
+The scripts pull in gym, pygame or tkinter before they can do anything,
+and train or open their window from main(). Here each subcommand imports
+only what it uses. play and evaluate read a saved table (any qtable_io
+format, quantize.py exports included) and step the NumPy Taxi-v3 model
+from taxi_vec_env, so neither gymnasium nor matplotlib is loaded and
+they start in a fraction of a second. train runs the batched trainer and
+saves q_table.qtbl. gui opens a window on a saved table: taxi renders
+greedy episodes through gymnasium and matplotlib, and movement / tk
+start the pygame and Tkinter grid GUIs, which load their own saved
+tables.
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GUI_SCRIPTS = {"movement": "Taxi_movement_gui.py", "tk": "import pygame.py"}
+
+
+# Function to open a saved table, or exit with a hint when there is none
+def _require_table(path):
+    if not os.path.exists(path):
+        sys.exit(f"No trained table at {path}; run 'python taxi_cli.py train' first")
+    import qtable_io
+    return qtable_io.read_header(path), qtable_io.load_q_table(path)
+
+
+# Function to exit unless a saved table is a Taxi-v3 one (play and the taxi window only drive Taxi-v3)
+def _require_taxi_table(path):
+    import taxi_vec_env
+
+    header, _ = _require_table(path)
+    if tuple(header["shape"]) != (taxi_vec_env.NUM_STATES, taxi_vec_env.NUM_ACTIONS):
+        sys.exit(f"{path} is a {'x'.join(map(str, header['shape']))} table, not a Taxi-v3 one; "
+                 f"use 'evaluate' or 'gui movement' / 'gui tk' for grid tables")
+
+
+def cmd_train(args):
+    import evaluation
+    import qtable_io
+    import taxi_vec_env
+
+    hyperparameters = {"learning_rate": 0.1, "discount_rate": 0.99, "exploration_decay_rate": 0.001,
+                       "num_episodes": args.episodes, "planning_steps": args.planning_steps}
+    q_table, rewards = taxi_vec_env.train_q_learning(
+        args.episodes, learning_rate=0.1, discount_rate=0.99, exploration_decay_rate=0.001, seed=args.seed,
+        planning_steps=args.planning_steps, prioritized_sweeping=args.prioritized)
+    qtable_io.save_q_table(args.out, q_table, env_id="Taxi-v3", hyperparameters=hyperparameters)
+    print(f"Trained {args.episodes} episodes (mean reward of the last 1000: {rewards[-1000:].mean():.2f})")
+    print(f"Saved {args.out}")
+    evaluation.print_report(evaluation.evaluate_taxi(q_table), "Greedy policy over all start states")
+
+
+def cmd_play(args):
+    import time
+
+    import numpy as np
+
+    import qtable_io
+    import taxi_vec_env
+
+    _require_taxi_table(args.table)
+    greedy = qtable_io.load_policy(args.table)
+    rng = np.random.default_rng(args.seed)
+    for episode in range(args.episodes):
+        state = int(rng.choice(taxi_vec_env.INITIAL_STATES))
+        total_reward = 0
+        print(f"\nEpisode {episode + 1}")
+        print(taxi_vec_env.render_text(state))
+        for step in range(args.max_steps):
+            time.sleep(args.delay)
+            action = greedy.action(state)
+            reward = int(taxi_vec_env.REWARD[state, action])
+            done = bool(taxi_vec_env.DONE[state, action])
+            state = int(taxi_vec_env.NEXT_STATE[state, action])
+            total_reward += reward
+            print(f"\n{taxi_vec_env.ACTION_NAMES[action]} ({reward:+d})")
+            print(taxi_vec_env.render_text(state))
+            if done:
+                print(f"**** Reached Goal in {step + 1} steps, total reward {total_reward} ****")
+                break
+        else:
+            print(f"**** Failed after {args.max_steps} steps ****")
+
+
+def cmd_evaluate(args):
+    import numpy as np
+
+    import evaluation
+
+    header, q_table = _require_table(args.table)
+    q_table = np.asarray(q_table)
+    if q_table.ndim == 3:
+        hyperparameters = header["hyperparameters"]
+        if "goal" not in hyperparameters:
+            sys.exit(f"{args.table} does not record the goal its grid was trained for")
+        obstacles = {tuple(o) for o in hyperparameters.get("obstacles", [])}
+        report = evaluation.evaluate_grid(q_table, obstacles, tuple(hyperparameters["goal"]),
+                                          max_steps=args.max_steps)
+        evaluation.print_report(report, "Greedy policy over every free cell")
+    else:
+        report = evaluation.evaluate_taxi(q_table, max_steps=args.max_steps or 200)
+        evaluation.print_report(report, "Greedy policy over all start states")
+
+
+def cmd_gui(args):
+    if args.window != "taxi":
+        # The grid GUIs run exactly as if started directly, and pick up their own saved tables
+        import runpy
+        sys.argv = [GUI_SCRIPTS[args.window]]
+        runpy.run_path(os.path.join(HERE, GUI_SCRIPTS[args.window]), run_name="__main__")
+        return
+
+    import gymnasium as gym
+    import matplotlib.pyplot as plt
+
+    import qtable_io
+
+    _require_taxi_table(args.table)
+    greedy = qtable_io.load_policy(args.table)
+    env = gym.make("Taxi-v3", render_mode="rgb_array")
+    for episode in range(args.episodes):
+        state, _ = env.reset(seed=args.seed if episode == 0 else None)
+        image = plt.imshow(env.render())
+        plt.axis("off")
+        plt.title(f"Episode {episode + 1}")
+        for _ in range(args.max_steps):
+            state, reward, done, truncated, _ = env.step(greedy.action(int(state)))
+            image.set_data(env.render())
+            plt.pause(args.delay)
+            if done or truncated:
+                break
+    plt.close()
+    env.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="train a Taxi-v3 table with the batched trainer and save it")
+    train.add_argument("--episodes", type=int, default=10000)
+    train.add_argument("--planning-steps", type=int, default=0, help="Dyna-Q model updates per real step")
+    train.add_argument("--prioritized", action="store_true", help="prioritized sweeping for Dyna-Q planning")
+    train.add_argument("--seed", type=int, default=42)
+    train.add_argument("--out", default="q_table.qtbl")
+    train.set_defaults(run=cmd_train)
+
+    play = commands.add_parser("play", help="watch the saved greedy policy drive in the terminal")
+    play.add_argument("--table", default="q_table.qtbl")
+    play.add_argument("--episodes", type=int, default=3)
+    play.add_argument("--delay", type=float, default=0.3, help="seconds between steps")
+    play.add_argument("--max-steps", type=int, default=200)
+    play.add_argument("--seed", type=int)
+    play.set_defaults(run=cmd_play)
+
+    evaluate = commands.add_parser("evaluate", help="audit a saved Taxi or grid table from every start state")
+    evaluate.add_argument("--table", default="q_table.qtbl")
+    evaluate.add_argument("--max-steps", type=int)
+    evaluate.set_defaults(run=cmd_evaluate)
+
+    gui = commands.add_parser("gui", help="open a graphical view")
+    gui.add_argument("window", choices=["taxi"] + sorted(GUI_SCRIPTS),
+                     help="taxi: rendered Taxi-v3 episodes; movement: pygame grid; tk: Tkinter grid")
+    gui.add_argument("--table", default="q_table.qtbl", help="Taxi table for the taxi window")
+    gui.add_argument("--episodes", type=int, default=3)
+    gui.add_argument("--delay", type=float, default=0.5)
+    gui.add_argument("--max-steps", type=int, default=200)
+    gui.add_argument("--seed", type=int)
+    gui.set_defaults(run=cmd_gui)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
+import sys
+
 import gymnasium as gym
 import numpy as np
-import json
+
+import qtable_io
 
 # Initialize environment with ANSI render mode for text-based display
 env = gym.make('Taxi-v3', render_mode="ansi")
 
-# Load Q-Table
-try:
-    with open("q_table.json", "r") as f:
-        q_table = np.array(json.load(f))
-except FileNotFoundError:
+# Load Q-Table (memory-mapped; a legacy q_table.json is migrated on first load)
+# Any quantize.py export works too: python taxi_game.py q_table.int8.qtbl
+Q_TABLE_PATH = sys.argv[1] if len(sys.argv) > 1 else qtable_io.DEFAULT_PATH
+q_table = qtable_io.open_q_table(Q_TABLE_PATH, env_id="Taxi-v3")
+if q_table is None:
     q_table = np.zeros((env.observation_space.n, env.action_space.n))
 
 # Mapping for passenger and drop-off locations
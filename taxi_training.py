@@ -0,0 +1,177 @@
+"""Scalar Q-learning on a gym Taxi-v3 env, shared by the Taxi scripts.
+
+run_taxi_training() is the train_agent() loop of autonomousTaxi_basic.py
+and autinomousTaxi_gui.py: epsilon-greedy steps drawn from one BlockRNG,
+with optional Dyna-Q planning or experience replay, per-episode
+telemetry under telemetry/<name>, and background checkpoints under
+checkpoints/<name>. Running it again after an interruption resumes from
+the newest checkpoint, provided it was written in the same planner/replay
+mode; otherwise the run exits with a message. The scripts keep their own
+settings and output.
+"""
+import sys
+
+import numpy as np
+
+import block_rng
+import checkpoint
+import dyna
+import evaluation
+import instrument
+import replay
+import telemetry
+
+
+# Function to train q_table in place on env; returns {"episodes", "training_steps", "solved", "telemetry_path"}
+# on_episode(episode, total_reward, stream) runs after every episode, and on_finished(result) once training
+# ends but before the checkpoints are cleared (e.g. to save the table first)
+def run_taxi_training(env, q_table, name, num_episodes=10000, max_steps_per_episode=100, learning_rate=0.1,
+                      discount_rate=0.99, max_exploration_rate=1, min_exploration_rate=0.01,
+                      exploration_decay_rate=0.001, seed=42, planning_steps=0, prioritized_sweeping=True,
+                      replay_batch=0, replay_every=4, prioritized_replay=False, checkpoint_interval=5.0,
+                      on_episode=None, on_finished=None):
+    # One seed drives every random draw; coins and actions are pre-drawn in blocks
+    rng = block_rng.BlockRNG(seed, num_actions=q_table.shape[1])
+
+    # Dyna-Q mode: every real step also replays planning_steps remembered transitions from a learned model
+    planner = dyna.DynaPlanner(q_table, planning_steps, learning_rate, discount_rate, prioritized=prioritized_sweeping,
+                               generator=rng.generator) if planning_steps else None
+
+    # Replay mode: transitions go to a ring buffer, and every replay_every steps the Q-table learns from a
+    # minibatch of replay_batch of them in one array update
+    buffer = replay.ReplayBuffer(50000, prioritized=prioritized_replay) if replay_batch else None
+
+    # Both modes learn far faster than exploration decays, so they stop once the greedy policy is solved
+    stop_when_solved = bool(planning_steps or replay_batch)
+
+    # What a checkpoint's planner and buffer state depend on; a checkpoint only resumes under the same mode
+    training_mode = {
+        "planner": ("prioritized" if prioritized_sweeping else "uniform") if planning_steps else None,
+        "replay": ("prioritized" if prioritized_replay else "uniform") if replay_batch else None,
+    }
+
+    # An interrupted run leaves checkpoints behind; the next run resumes from the newest
+    checkpoint_dir = f"checkpoints/{name}"
+    resume_path = checkpoint.latest(checkpoint_dir)
+    resume_state = checkpoint.load(resume_path) if resume_path else None
+    if resume_state and resume_state.get("mode") != training_mode:
+        sys.exit(f"{resume_path} was written in mode {resume_state.get('mode')}, but this run uses {training_mode}; "
+                 f"switch the settings back to resume, or delete {checkpoint_dir} to start over")
+
+    # Episode stats go to a fixed-size ring buffer, streamed to disk by a background thread
+    stream = telemetry.Telemetry(f"telemetry/{name}", resume_rows=resume_state and resume_state["telemetry_rows"])
+    checkpoints = checkpoint.Checkpointer(checkpoint_dir, interval=checkpoint_interval, keep=3)
+
+    exploration_rate = max_exploration_rate
+    training_steps = 0
+    start_episode = 0
+    if resume_state:
+        print(f"Resuming from {resume_path}")
+        q_table[:] = resume_state["q_table"]
+        exploration_rate = resume_state["exploration_rate"]
+        training_steps = resume_state.get("training_steps", 0)
+        rng.set_state(resume_state["rng"])
+        env.unwrapped.np_random.bit_generator.state = resume_state["env_rng"]
+        start_episode = resume_state["episode"]
+        if planner:
+            planner.set_state(resume_state["planner"])
+        if buffer is not None:
+            buffer.set_state(resume_state["replay"])
+
+    # Profiled phases (TAXI_PROFILE=1); with profiling off these are the plain callables
+    env = instrument.wrap_env(env)
+    argmax = instrument.wrap("np.argmax", np.argmax)
+    q_max = instrument.wrap("np.max", np.max)
+    coin = instrument.wrap("rng.coin", rng.coin)
+    random_action = instrument.wrap("rng.action", rng.action)
+    record = instrument.wrap("telemetry.record", stream.record)
+    plan = instrument.wrap("dyna.plan", planner.plan) if planner else None
+    replay_step = instrument.wrap("replay.step", replay.replay_step)
+
+    solved = False
+    episode = start_episode - 1
+    with instrument.span("train"):  # Its self time is the Q update and loop bookkeeping
+        for episode in range(start_episode, num_episodes):
+            state = int(env.reset(seed=seed if episode == 0 else None)[0])
+            done = False
+            total_reward = 0
+            td_sum = td_max = 0.0
+            td_count = 0
+
+            for step in range(max_steps_per_episode):
+                # Exploration vs Exploitation trade-off
+                if coin() > exploration_rate:
+                    action = argmax(q_table[state, :])  # Exploitation
+                else:
+                    action = random_action()  # Exploration
+
+                new_state, reward, done, truncated, _ = env.step(action)
+                new_state = int(new_state)
+
+                if buffer is not None:
+                    # Replay mode: store the transition and learn from a minibatch every few steps
+                    buffer.add(state, action, reward, new_state, done)
+                    if (step + 1) % replay_every == 0 and len(buffer) >= replay_batch:
+                        td_errors = abs(replay_step(q_table, buffer, replay_batch, learning_rate, discount_rate,
+                                                    rng.generator))
+                        td_sum += td_errors.sum()
+                        td_count += td_errors.size
+                        td_max = max(td_max, td_errors.max())
+                else:
+                    # Update Q-Table using the Bellman Equation
+                    target = reward + discount_rate * q_max(q_table[new_state, :])
+                    td_error = abs(target - q_table[state, action])
+                    q_table[state, action] = q_table[state, action] * (1 - learning_rate) + learning_rate * target
+                    td_sum += td_error
+                    td_count += 1
+                    td_max = max(td_max, td_error)
+
+                # Dyna-Q: remember the transition and learn from the model as well
+                if planner:
+                    planner.record(state, action, new_state, reward, done)
+                    plan()
+
+                state = new_state
+                total_reward += reward
+                training_steps += 1
+
+                if done or truncated:
+                    break
+
+            record(total_reward, step + 1, exploration_rate, td_sum / max(td_count, 1), td_max)
+
+            # Decay the exploration rate using exponential decay
+            exploration_rate = min_exploration_rate + (max_exploration_rate - min_exploration_rate) * np.exp(-exploration_decay_rate * episode)
+
+            if on_episode is not None:
+                on_episode(episode, total_reward, stream)
+
+            # Snapshot the full trainer state every checkpoint_interval seconds, written on a background thread
+            if checkpoints.due():
+                checkpoints.save(episode + 1, {
+                    "episode": episode + 1,
+                    "exploration_rate": exploration_rate,
+                    "training_steps": training_steps,
+                    "q_table": q_table,
+                    "rng": rng.get_state(),
+                    "env_rng": env.unwrapped.np_random.bit_generator.state,
+                    "telemetry_rows": stream.sync(),  # Flushed first, so the rows it counts are all on disk
+                    "mode": training_mode,
+                    "planner": planner.get_state() if planner else None,
+                    "replay": buffer.get_state() if buffer is not None else None,
+                })
+
+            # Check the greedy policy against every start state
+            if stop_when_solved and episode % 25 == 0 and evaluation.evaluate_taxi(q_table)["success_rate"] == 1.0:
+                solved = True
+                break
+
+    stream.close()
+    result = {"episodes": episode + 1, "training_steps": training_steps, "solved": solved,
+              "telemetry_path": stream.path}
+    if on_finished is not None:
+        on_finished(result)
+    # The run is complete, so its checkpoints are no longer needed
+    checkpoints.close()
+    checkpoints.clear()
+    return result
@@ -0,0 +1,225 @@
+"""Vectorized Taxi-v3 engine.
+
+Runs many Taxi environments in lockstep from a precomputed
+(state, action) -> (next_state, reward, done) table with the same
+500-state / 6-action dynamics as gymnasium's Taxi-v3, plus a batched
+Q-learning trainer that fills the usual (500, 6) q_table.
+"""
+import numpy as np
+
+import block_rng
+import dyna
+import instrument
+import sparse_q
+
+# Same map and pickup/drop-off locations as gymnasium's Taxi-v3
+MAP = [
+    "+---------+",
+    "|R: | : :G|",
+    "| : | : : |",
+    "| : : : : |",
+    "| | : | : |",
+    "|Y| : |B: |",
+    "+---------+",
+]
+LOCS = [(0, 0), (0, 4), (4, 0), (4, 3)]
+
+NUM_ROWS, NUM_COLS = 5, 5
+NUM_STATES = 500
+NUM_ACTIONS = 6
+ACTION_NAMES = ["South", "North", "East", "West", "Pickup", "Dropoff"]
+
+
+# Function to encode (taxi_row, taxi_col, pass_loc, dest) into a state index
+def encode_state(taxi_row, taxi_col, pass_loc, dest):
+    return ((taxi_row * NUM_COLS + taxi_col) * 5 + pass_loc) * 4 + dest
+
+
+# Function to decode a state index (or an array of them)
+def decode_state(state):
+    state = np.asarray(state)
+    dest = state % 4
+    pass_loc = (state // 4) % 5
+    taxi_col = (state // 20) % NUM_COLS
+    taxi_row = state // 100
+    return taxi_row, taxi_col, pass_loc, dest
+
+
+# Function to build the full transition table for every (state, action) pair
+def build_transition_table():
+    desc = np.asarray(MAP, dtype="c")
+    taxi_row, taxi_col, pass_loc, dest = decode_state(np.arange(NUM_STATES))
+
+    # Walls between columns are the '|' characters in the map
+    can_east = desc[1 + taxi_row, 2 * taxi_col + 2] == b":"
+    can_west = desc[1 + taxi_row, 2 * taxi_col] == b":"
+
+    locs = np.array(LOCS)
+    at_loc = (taxi_row[:, None] == locs[:, 0]) & (taxi_col[:, None] == locs[:, 1])
+    loc_idx = np.where(at_loc.any(axis=1), at_loc.argmax(axis=1), -1)
+
+    next_state = np.empty((NUM_STATES, NUM_ACTIONS), dtype=np.int32)
+    reward = np.full((NUM_STATES, NUM_ACTIONS), -1, dtype=np.int8)
+    done = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=bool)
+
+    next_state[:, 0] = encode_state(np.minimum(taxi_row + 1, NUM_ROWS - 1), taxi_col, pass_loc, dest)
+    next_state[:, 1] = encode_state(np.maximum(taxi_row - 1, 0), taxi_col, pass_loc, dest)
+    next_state[:, 2] = encode_state(taxi_row, np.where(can_east, np.minimum(taxi_col + 1, NUM_COLS - 1), taxi_col), pass_loc, dest)
+    next_state[:, 3] = encode_state(taxi_row, np.where(can_west, np.maximum(taxi_col - 1, 0), taxi_col), pass_loc, dest)
+
+    # Pickup: only legal when the taxi stands on the waiting passenger
+    can_pickup = (pass_loc < 4) & (loc_idx == pass_loc)
+    next_state[:, 4] = encode_state(taxi_row, taxi_col, np.where(can_pickup, 4, pass_loc), dest)
+    reward[~can_pickup, 4] = -10
+
+    # Drop-off: +20 and done at the destination, free drop at any other stand
+    in_taxi = pass_loc == 4
+    success = in_taxi & (loc_idx == dest)
+    other_stand = in_taxi & (loc_idx >= 0) & ~success
+    new_pass = np.where(success, dest, np.where(other_stand, loc_idx, pass_loc))
+    next_state[:, 5] = encode_state(taxi_row, taxi_col, new_pass, dest)
+    reward[:, 5] = np.where(success, 20, np.where(other_stand, -1, -10))
+    done[:, 5] = success
+
+    return next_state, reward, done
+
+
+# Start states used by Taxi-v3 resets: passenger waiting at a stand that is not the destination
+def initial_states():
+    _, _, pass_loc, dest = decode_state(np.arange(NUM_STATES))
+    return np.flatnonzero((pass_loc < 4) & (pass_loc != dest))
+
+
+NEXT_STATE, REWARD, DONE = build_transition_table()
+INITIAL_STATES = initial_states()
+
+LOC_NAMES = ["R (Red)", "G (Green)", "Y (Yellow)", "B (Blue)", "In Taxi"]
+
+
+# Function to draw a state as text in the style of Taxi-v3's "ansi" render mode:
+# taxi yellow (green once loaded), waiting passenger blue, destination magenta
+def render_text(state):
+    taxi_row, taxi_col, pass_loc, dest = (int(v) for v in decode_state(state))
+    rows = [list(row) for row in MAP]
+
+    def paint(row, col, code):
+        cell = rows[1 + row][2 * col + 1]
+        rows[1 + row][2 * col + 1] = f"\x1b[{code}m{cell}\x1b[0m"
+
+    if pass_loc < 4:
+        paint(*LOCS[pass_loc], "1;34")
+    paint(*LOCS[dest], "1;35")
+    paint(taxi_row, taxi_col, "42" if pass_loc == 4 else "43")
+    status = f"Passenger: {LOC_NAMES[pass_loc]}  Destination: {LOC_NAMES[dest]}"
+    return "\n".join("".join(row) for row in rows) + "\n" + status
+
+
+class VecTaxiEnv:
+    """N Taxi-v3 environments stepped together with array lookups.
+
+    Finished environments are reset automatically; step() returns the
+    true successor states while self.states already holds the new starts.
+    """
+
+    def __init__(self, num_envs, max_steps=100, seed=None):
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.states = np.zeros(num_envs, dtype=np.int32)
+        self.steps = np.zeros(num_envs, dtype=np.int32)
+
+    def reset(self):
+        self.states = self.rng.choice(INITIAL_STATES, size=self.num_envs).astype(np.int32)
+        self.steps[:] = 0
+        return self.states.copy()
+
+    def step(self, actions):
+        next_states = NEXT_STATE[self.states, actions]
+        rewards = REWARD[self.states, actions]
+        terminated = DONE[self.states, actions]
+        self.steps += 1
+        truncated = (self.steps >= self.max_steps) & ~terminated
+
+        finished = terminated | truncated
+        self.states = next_states.copy()
+        if finished.any():
+            self.states[finished] = self.rng.choice(INITIAL_STATES, size=int(finished.sum()))
+            self.steps[finished] = 0
+        return next_states, rewards, terminated, truncated
+
+
+# Function to train a Taxi-v3 Q-table with many environments in lockstep
+@instrument.timed("vec_taxi.train")
+def train_q_learning(num_episodes=10000, max_steps_per_episode=100, learning_rate=0.1,
+                     discount_rate=0.99, max_exploration_rate=1, min_exploration_rate=0.01,
+                     exploration_decay_rate=0.001, num_envs=256, seed=None, q_table=None, rng=None,
+                     telemetry=None, planning_steps=0, prioritized_sweeping=False):
+    if q_table is None:
+        q_table = np.zeros((NUM_STATES, NUM_ACTIONS))
+    q_table, _, q_get, q_add = sparse_q.accessors(q_table, NUM_ACTIONS)
+    rng = block_rng.as_block_rng(rng if rng is not None else seed, NUM_ACTIONS)
+    num_envs = min(num_envs, num_episodes)
+    env = VecTaxiEnv(num_envs, max_steps_per_episode, seed=rng.generator)
+    states = env.reset()
+    # Profiled phases (TAXI_PROFILE=1); the Q update is the train span's self time
+    env_step = instrument.wrap("vec_taxi.env_step", env.step)
+    coins, random_actions = instrument.wrap("rng.coins", rng.coins), instrument.wrap("rng.actions", rng.actions)
+    # Dyna-Q: each real step is also stored in a model, and planning_steps model updates per env follow it
+    planner = None
+    if planning_steps:
+        planner = dyna.DynaPlanner(q_table, planning_steps, learning_rate, discount_rate,
+                                   prioritized=prioritized_sweeping, generator=rng.generator)
+        plan = instrument.wrap("dyna.plan", planner.plan)
+
+    rewards_all_episodes = np.zeros(num_episodes)
+    episode_ids = np.arange(num_envs)
+    active = episode_ids < num_episodes
+    next_episode = num_envs
+    totals = np.zeros(num_envs)
+    if telemetry is not None:
+        lengths = np.zeros(num_envs, dtype=np.int32)
+        td_sums, td_maxes = np.zeros(num_envs), np.zeros(num_envs)
+
+    while active.any():
+        # Same schedule as the scripts: episode k explores with the rate decayed k - 1 times
+        exploration_rate = min_exploration_rate + (max_exploration_rate - min_exploration_rate) * \
+            np.exp(-exploration_decay_rate * np.maximum(episode_ids - 1, 0))
+        explore = coins(num_envs) < exploration_rate
+        actions = np.where(explore, random_actions(num_envs),
+                           np.argmax(q_table[states], axis=1))
+
+        new_states, rewards, terminated, truncated = env_step(actions)
+
+        # Batched Bellman update
+        idx = (states * NUM_ACTIONS + actions)[active]
+        target = rewards + discount_rate * np.max(q_table[new_states], axis=1) * ~terminated
+        td_all = target - q_get(states * NUM_ACTIONS + actions)
+        td_error = td_all[active]
+        sparse_q.td_apply(q_add, idx, td_error, learning_rate)
+        if planner is not None:
+            planner.record_many(states[active], actions[active], new_states[active], rewards[active],
+                                terminated[active])
+            plan(planning_steps * int(active.sum()))
+
+        totals += rewards
+        finished = (terminated | truncated) & active
+        if telemetry is not None:
+            lengths += 1
+            td_sums += np.abs(td_all)
+            np.maximum(td_maxes, np.abs(td_all), out=td_maxes)
+            if finished.any():
+                telemetry.record_many(totals[finished], lengths[finished], exploration_rate[finished],
+                                      td_sums[finished] / lengths[finished], td_maxes[finished],
+                                      episode=episode_ids[finished])
+                lengths[finished] = 0
+                td_sums[finished] = td_maxes[finished] = 0
+        if finished.any():
+            rewards_all_episodes[episode_ids[finished]] = totals[finished]
+            totals[finished] = 0
+            count = int(finished.sum())
+            episode_ids[finished] = next_episode + np.arange(count)
+            next_episode += count
+            active &= episode_ids < num_episodes
+        states = env.states
+
+    return q_table, rewards_all_episodes
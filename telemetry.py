@@ -0,0 +1,218 @@
+"""Per-episode training telemetry with bounded memory.
+
+Telemetry keeps the most recent episodes in a preallocated ring buffer,
+one NumPy array per column (episode, reward, length, epsilon and the
+mean/max absolute TD error). A background thread appends new rows to a
+columnar run directory, one raw little-endian file per column plus
+columns.json, so memory stays fixed however long the run is. record()
+only writes into the ring and never waits on the disk; once half the ring
+is unflushed it just nudges the writer awake. If the writer still falls a
+whole ring behind, the overwritten rows are counted as dropped.
+
+The live plot runs in its own process and tails the run directory, so
+drawing never slows training:
+
+    python telemetry.py plot telemetry/taxi        # live learning curves
+    python telemetry.py summary telemetry/taxi     # average reward per 1000 episodes
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+
+COLUMNS = {
+    "episode": np.dtype("<i8"),
+    "reward": np.dtype("<f4"),
+    "length": np.dtype("<i4"),
+    "epsilon": np.dtype("<f4"),
+    "td_mean": np.dtype("<f4"),  # Mean |TD error| over the episode's updates
+    "td_max": np.dtype("<f4"),  # Largest |TD error| in the episode
+}
+
+
+class Telemetry:
+    """Ring buffer of episode stats, flushed to a columnar run directory in the background."""
+
+    def __init__(self, path=None, capacity=65536, flush_interval=1.0, resume_rows=None):
+        self.path = path
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.count = 0  # Rows ever recorded
+        self._first = 0  # First row the ring holds; rows before it are only on disk
+        self.dropped = 0
+        self._flushed = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "columns.json"), "w") as f:
+                json.dump({name: dtype.str for name, dtype in COLUMNS.items()}, f)
+            # A resumed run keeps the rows written up to its checkpoint; a new run starts empty
+            files = {name: os.path.join(path, f"{name}.bin") for name in COLUMNS}
+            kept = 0
+            if resume_rows:
+                kept = min(resume_rows, *(os.path.getsize(f) // COLUMNS[name].itemsize if os.path.exists(f) else 0
+                                          for name, f in files.items()))
+            for name, file in files.items():
+                with open(file, "ab") as f:
+                    f.truncate(COLUMNS[name].itemsize * kept)
+            self.count = self._flushed = self._first = resume_rows or 0
+            # Reload the newest kept rows, so recent() also covers the episodes before the checkpoint
+            if kept == self.count:
+                tail = min(kept, capacity)
+                slots = np.arange(kept - tail, kept) % capacity
+                for name, file in files.items():
+                    itemsize = COLUMNS[name].itemsize
+                    self.columns[name][slots] = np.fromfile(file, COLUMNS[name], tail, offset=(kept - tail) * itemsize)
+                self._first = kept - tail
+            self._thread = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+            self._thread.start()
+
+    # Function to record one finished episode
+    def record(self, reward, length, epsilon, td_mean=np.nan, td_max=np.nan):
+        i = self.count % self.capacity
+        columns = self.columns
+        columns["episode"][i] = self.count
+        columns["reward"][i] = reward
+        columns["length"][i] = length
+        columns["epsilon"][i] = epsilon
+        columns["td_mean"][i] = td_mean
+        columns["td_max"][i] = td_max
+        self.count += 1
+        if self.count - self._flushed >= self.capacity // 2:
+            self._wake.set()
+
+    # Function to record a batch of finished episodes (arrays of equal length) from a vectorized trainer
+    def record_many(self, reward, length, epsilon, td_mean=np.nan, td_max=np.nan, episode=None):
+        n = len(reward)
+        if n > self.capacity:
+            raise ValueError(f"Batch of {n} episodes does not fit a ring of {self.capacity}")
+        slots = np.arange(self.count, self.count + n) % self.capacity
+        values = {"episode": np.arange(self.count, self.count + n) if episode is None else episode,
+                  "reward": reward, "length": length, "epsilon": epsilon, "td_mean": td_mean, "td_max": td_max}
+        for name, value in values.items():
+            self.columns[name][slots] = value
+        self.count += n
+        if self.count - self._flushed >= self.capacity // 2:
+            self._wake.set()
+
+    # Function to get the last n rows held in memory (all of them when n is None), oldest first
+    def recent(self, n=None):
+        held = min(self.count - self._first, self.capacity)
+        n = held if n is None else min(n, held)
+        slots = np.arange(self.count - n, self.count) % self.capacity
+        return {name: column[slots] for name, column in self.columns.items()}
+
+    # Function to append rows recorded since the last flush to the run directory
+    def flush(self):
+        if self.path is None:
+            return
+        with self._flush_lock:
+            end = self.count
+            start = max(self._flushed, end - self.capacity)
+            self.dropped += start - self._flushed
+            if end > start:
+                slots = np.arange(start, end) % self.capacity
+                for name, column in self.columns.items():
+                    with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                        f.write(column[slots].tobytes())
+            self._flushed = end
+
+    # Function to flush and return the row count, for a training checkpoint: every row it counts is then on disk
+    def sync(self):
+        self.flush()
+        return self.count
+
+    def _flush_loop(self, interval):
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+
+    # Function to stop the writer thread after a final flush
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    # Function to open the live plot in a separate process
+    def start_live_plot(self, window=100):
+        if self.path is None:
+            raise ValueError("Live plotting tails the run directory; create Telemetry with a path")
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__), "plot", self.path,
+                                 "--window", str(window)])
+
+
+# Function to read a run directory as one array per column (rows still being written are cut off)
+def load(path):
+    with open(os.path.join(path, "columns.json")) as f:
+        dtypes = {name: np.dtype(code) for name, code in json.load(f).items()}
+    columns = {name: np.fromfile(os.path.join(path, f"{name}.bin"), dtype=dtype) for name, dtype in dtypes.items()}
+    rows = min(len(column) for column in columns.values())
+    return {name: column[:rows] for name, column in columns.items()}
+
+
+# Function to average a column over consecutive blocks of `every` episodes
+def block_means(values, every=1000):
+    blocks = len(values) // every
+    return values[:blocks * every].reshape(blocks, every).mean(axis=1)
+
+
+# Function to trail a moving average behind a column
+def moving_average(values, window=100):
+    if len(values) < window:
+        return values.astype(np.float64)
+    cumsum = np.cumsum(np.insert(values.astype(np.float64), 0, 0))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+# Function to redraw learning curves from a run directory until the window is closed
+def watch(path, window=100, interval=1.0):
+    import matplotlib.pyplot as plt  # Only the plotting process needs matplotlib
+
+    fig, axes = plt.subplots(4, 1, sharex=True, figsize=(8, 9))
+    names = ("reward", "length", "epsilon", "td_mean")
+    lines = [ax.plot([], [])[0] for ax in axes]
+    for ax, name in zip(axes, names):
+        ax.set_ylabel(name)
+    axes[-1].set_xlabel("episodes finished")
+    while plt.fignum_exists(fig.number):
+        if os.path.exists(os.path.join(path, "columns.json")):
+            columns = load(path)
+            for ax, line, name in zip(axes, lines, names):
+                values = moving_average(columns[name], window)
+                # x is episodes finished so far; vectorized trainers finish episodes out of id order
+                line.set_data(np.arange(len(columns[name]) - len(values), len(columns[name])), values)
+                ax.relim()
+                ax.autoscale_view()
+        plt.pause(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a telemetry run directory")
+    parser.add_argument("command", choices=("plot", "summary"))
+    parser.add_argument("path")
+    parser.add_argument("--window", type=int, default=100, help="moving-average window for plot")
+    parser.add_argument("--every", type=int, default=1000, help="block size for summary")
+    args = parser.parse_args(argv)
+
+    if args.command == "plot":
+        watch(args.path, args.window)
+        return
+    columns = load(args.path)
+    print(f"Average reward per {args.every} episodes:")
+    for i, mean in enumerate(block_means(columns["reward"], args.every), start=1):
+        print(i * args.every, ":", mean)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pytest
+
+import background_training
+import checkpoint
+
+SHAPE = (20, 20, 4)
+EPISODES = 3000
+TRAIN_KWARGS = {"grid_size": 20, "obstacles": {(5, 5), (5, 6), (12, 3)}, "start_pos": None, "goal_pos": (18, 18),
+                "seed": 7, "max_steps": 200}
+
+
+# Function to run a trainer to completion, polling like a GUI frame loop; returns the final table
+def train(trainer, q_table, **kwargs):
+    trainer.start(q_table, EPISODES, **TRAIN_KWARGS, **kwargs)
+    while trainer.running:
+        trainer.poll(q_table)
+        time.sleep(0.01)
+    return q_table
+
+
+# Function to wait until the worker has written a checkpoint, then kill it
+def kill_after_checkpoint(trainer, directory, timeout=60):
+    deadline = time.monotonic() + timeout
+    while checkpoint.latest(directory) is None:
+        assert trainer.process.is_alive(), "the worker finished before it could be killed"
+        assert time.monotonic() < deadline, "no checkpoint was written"
+        time.sleep(0.01)
+    trainer.stop()
+
+
+@pytest.mark.parametrize("dyna_kwargs", [{}, {"planning_steps": 5, "prioritized_sweeping": True}],
+                         ids=["q_learning", "prioritized_sweeping"])
+def test_kill_and_resume_matches_an_uninterrupted_run(tmp_path, dyna_kwargs):
+    directory = str(tmp_path / "checkpoints")
+    expected = train(background_training.BackgroundTrainer(SHAPE, chunk_episodes=50), np.zeros(SHAPE), **dyna_kwargs)
+
+    killed = background_training.BackgroundTrainer(SHAPE, chunk_episodes=50)
+    killed.start(np.zeros(SHAPE), EPISODES, checkpoint_dir=directory, checkpoint_interval=0, **TRAIN_KWARGS,
+                 **dyna_kwargs)
+    kill_after_checkpoint(killed, directory)
+    assert checkpoint.load(checkpoint.latest(directory))["episodes"] < EPISODES
+
+    # A fresh process picks up the newest checkpoint, as after a crash
+    resumed = train(background_training.BackgroundTrainer(SHAPE, chunk_episodes=50), np.zeros(SHAPE),
+                    checkpoint_dir=directory, checkpoint_interval=0, resume=True, **dyna_kwargs)
+    assert resumed.tobytes() == expected.tobytes()
+    assert checkpoint.latest(directory) is None  # A finished run clears its checkpoints
+
+
+def test_crashed_worker_is_reported_as_a_failure():
+    finished, failed = [], []
+    trainer = background_training.BackgroundTrainer(SHAPE, chunk_episodes=50)
+    # An unknown train kwarg raises TypeError inside the worker
+    trainer.start(np.zeros(SHAPE), EPISODES, on_finished=lambda: finished.append(True), on_failed=failed.append,
+                  no_such_option=1, **TRAIN_KWARGS)
+    while trainer.running:
+        trainer.poll(np.zeros(SHAPE))
+        time.sleep(0.01)
+    assert finished == []
+    assert failed == [trainer.exitcode] and trainer.exitcode != 0
+
+
+def test_resume_refuses_a_checkpoint_from_another_map(tmp_path):
+    directory = str(tmp_path / "checkpoints")
+    killed = background_training.BackgroundTrainer(SHAPE, chunk_episodes=50)
+    killed.start(np.zeros(SHAPE), EPISODES, checkpoint_dir=directory, checkpoint_interval=0, **TRAIN_KWARGS)
+    kill_after_checkpoint(killed, directory)
+
+    failed = []
+    trainer = background_training.BackgroundTrainer(SHAPE, chunk_episodes=50)
+    trainer.start(np.zeros(SHAPE), EPISODES, on_failed=failed.append, checkpoint_dir=directory, resume=True,
+                  **{**TRAIN_KWARGS, "goal_pos": (1, 18)})
+    while trainer.running:
+        trainer.poll(np.zeros(SHAPE))
+        time.sleep(0.01)
+    assert failed and checkpoint.latest(directory) is not None  # The other run's checkpoint is kept
+
+
+def test_resume_without_a_checkpoint_dir_trains_from_scratch():
+    finished = []
+    trainer = background_training.BackgroundTrainer(SHAPE, chunk_episodes=50)
+    q_table = np.zeros(SHAPE)
+    trainer.start(q_table, 200, on_finished=lambda: finished.append(True), resume=True, **TRAIN_KWARGS)
+    while trainer.running:
+        trainer.poll(q_table)
+        time.sleep(0.01)
+    assert finished == [True] and q_table.any()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import block_rng
+
+
+def test_values_do_not_depend_on_how_they_are_drawn():
+    one_at_a_time, batched = block_rng.BlockRNG(3, 4, block_size=100), block_rng.BlockRNG(3, 4, block_size=100)
+    coins = [one_at_a_time.coin() for _ in range(250)]
+    actions = [one_at_a_time.action() for _ in range(250)]
+    assert np.array_equal(np.concatenate([batched.coins(7), batched.coins(200), batched.coins(43)]), coins)
+    assert np.array_equal(np.concatenate([batched.actions(150), batched.actions(100)]), actions)
+    assert set(actions) == {0, 1, 2, 3}
+
+
+def test_state_round_trip_continues_the_stream():
+    rng = block_rng.BlockRNG(5, 6, block_size=64)
+    [rng.coin() for _ in range(100)]
+    rng.actions(30)
+    state = rng.get_state()
+    expected = ([rng.coin() for _ in range(100)], rng.actions(100), rng.generator.random(3))
+
+    restored = block_rng.BlockRNG(0, 6, block_size=64)
+    restored.set_state(state)
+    assert [restored.coin() for _ in range(100)] == expected[0]
+    assert np.array_equal(restored.actions(100), expected[1])
+    assert np.array_equal(restored.generator.random(3), expected[2])
+
+
+def test_index_picks_uniformly_among_options():
+    rng = block_rng.BlockRNG(1)
+    counts = np.bincount([rng.index(3) for _ in range(30000)], minlength=3)
+    assert counts.size == 3 and counts.min() > 9000
+
+
+def test_as_block_rng_refuses_another_action_count():
+    taxi_rng = block_rng.BlockRNG(0, num_actions=6)
+    assert block_rng.as_block_rng(taxi_rng, 6) is taxi_rng
+    with pytest.raises(ValueError, match="6 actions"):
+        block_rng.as_block_rng(taxi_rng, 4)
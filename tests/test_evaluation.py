@@ -0,0 +1,31 @@
+import numpy as np
+
+import evaluation
+import planning
+
+
+def test_optimal_taxi_policy_delivers_from_every_start():
+    report = evaluation.evaluate_taxi(planning.solve_taxi())
+    assert report["starts"] == 300
+    assert report["success_rate"] == 1.0 and report["loops"] == 0
+    assert report["longest_steps"] <= 20
+
+
+def test_untrained_taxi_table_loops():
+    report = evaluation.evaluate_taxi(np.zeros((500, 6)))
+    assert report["success_rate"] == 0.0 and report["loops"] == 300
+
+
+def test_grid_audit_follows_the_masked_policy():
+    obstacles = {(1, 0), (1, 1), (1, 2)}
+    q_table = planning.solve_grid(5, obstacles, (4, 4))
+    report = evaluation.evaluate_grid(q_table, obstacles, (4, 4))
+    assert report["starts"] == 25 - 3 - 1
+    assert report["success_rate"] == 1.0
+    # Unmasked, the all-zero table walks into the wall at x = 0 forever
+    assert evaluation.evaluate_grid(np.zeros((5, 5, 4)), obstacles, (4, 4), mask_invalid=False)["loops"] == 21
+
+
+def test_boxed_in_cell_counts_as_a_loop():
+    report = evaluation.evaluate_grid(planning.solve_grid(4, {(0, 1), (1, 0)}, (3, 3)), {(0, 1), (1, 0)}, (3, 3))
+    assert report["loops"] == 1 and report["success_rate"] == 12 / 13
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import policy_server
+import qtable_io
+
+
+@pytest.fixture
+def server(tmp_path):
+    path, unix_path = str(tmp_path / "taxi.qtbl"), str(tmp_path / "policy.sock")
+    q_table = np.random.default_rng(0).random((500, 6))
+    qtable_io.save_q_table(path, q_table)
+    errors = []
+    loop = asyncio.new_event_loop()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    served = policy_server.PolicyServer({"taxi": path})
+    task = loop.create_task(served.serve(unix_path))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            policy_server.PolicyClient(unix_path).close()
+            break
+        except OSError:
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.01)
+    yield unix_path, q_table.argmax(axis=1), errors
+    loop.call_soon_threadsafe(task.cancel)
+    time.sleep(0.1)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_serves_greedy_actions_and_rejects_bad_requests(server):
+    unix_path, greedy, _ = server
+    client = policy_server.PolicyClient(unix_path)
+    assert client.act("taxi", 123) == greedy[123]
+    assert client.act_many("taxi", [0, 1, 499]) == greedy[[0, 1, 499]].tolist()
+    assert "error" in client._call({"table": "taxi", "state": 500})
+    assert "error" in client._call({"table": "taxi", "state": -1})
+    assert "error" in client._call([1, 2])
+    assert client.stats()["requests"] == 2
+    client.close()
+
+
+def test_client_that_disconnects_mid_request_is_dropped_quietly(server):
+    unix_path, greedy, errors = server
+    request = (json.dumps({"table": "taxi", "states": list(range(500))}) + "\n").encode()
+    for _ in range(5):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix_path)
+        sock.sendall(request * 200)  # Far more answers than the socket buffers hold
+        sock.close()  # Gone before reading any of them
+    time.sleep(0.5)
+
+    client = policy_server.PolicyClient(unix_path)
+    assert client.act("taxi", 7) == greedy[7]  # Still serving
+    client.close()
+    assert errors == []
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pytest
+
+import policy
+import qtable_io
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32", "float16"])
+@pytest.mark.parametrize("shape", [(500, 6), (15, 15, 4)])
+def test_v1_round_trip(tmp_path, dtype, shape):
+    path = str(tmp_path / "table.qtbl")
+    q_table = np.random.default_rng(0).normal(size=shape).astype(dtype)
+    hyperparameters = {"alpha": 0.5, "obstacles": [[1, 2]], "goal": [14, 14]}
+    qtable_io.save_q_table(path, q_table, env_id="Taxi-v3", hyperparameters=hyperparameters, training_steps=1234)
+
+    header = qtable_io.read_header(path)
+    assert header["shape"] == list(shape)
+    assert header["env_id"] == "Taxi-v3"
+    assert header["hyperparameters"] == hyperparameters
+    assert header["training_steps"] == 1234
+    assert header["data_offset"] % qtable_io.ALIGNMENT == 0
+    with open(path, "rb") as f:
+        assert qtable_io._PREFIX.unpack(f.read(qtable_io._PREFIX.size))[1] == 1  # Plain tables stay version 1
+
+    loaded = qtable_io.load_q_table(path)
+    assert isinstance(loaded, np.memmap)
+    assert loaded.dtype == q_table.dtype
+    assert np.array_equal(loaded, q_table)
+
+
+def test_v2_int8_rows_round_trip(tmp_path):
+    path = str(tmp_path / "table.qtbl")
+    codes = np.random.default_rng(1).integers(-127, 128, (500, 6)).astype(np.int8)
+    scale = np.full(500, 0.25, dtype=np.float16)
+    offset = np.linspace(-5, 5, 500).astype(np.float16)
+    qtable_io.save_encoded(path, "int8_rows", codes.shape, {"codes": codes, "scale": scale, "offset": offset},
+                           env_id="Taxi-v3", training_steps=7)
+
+    header = qtable_io.read_header(path)
+    assert header["encoding"] == "int8_rows"
+    assert header["training_steps"] == 7
+    assert all(info["offset"] % qtable_io.ALIGNMENT == 0 for info in header["sections"].values())
+    expected = codes * scale.astype(np.float64)[:, None] + offset.astype(np.float64)[:, None]
+    assert np.array_equal(qtable_io.load_q_table(path), expected)
+
+
+@pytest.mark.parametrize("shape", [(500, 6), (10, 10, 4)])
+def test_v2_policy_round_trip(tmp_path, shape):
+    path = str(tmp_path / "table.qtbl")
+    count, num_actions = int(np.prod(shape[:-1])), shape[-1]
+    actions = np.random.default_rng(2).integers(0, num_actions, count).astype(np.uint8)
+    if len(shape) == 3:
+        actions[::7] = policy.NO_ACTION
+    packed, bits = policy.pack_actions(actions, num_actions)
+    qtable_io.save_encoded(path, "policy", shape, {"actions": packed}, bits=bits)
+
+    assert np.array_equal(qtable_io.load_policy(path).actions, actions)
+    table = qtable_io.load_q_table(path).reshape(count, num_actions)
+    has_action = actions != policy.NO_ACTION
+    assert np.array_equal(table[has_action].argmax(axis=1), actions[has_action])
+    assert not table[~has_action].any()
+
+
+def test_rejects_unknown_files(tmp_path):
+    path = tmp_path / "table.qtbl"
+    path.write_bytes(b"NOPE" + bytes(16))
+    with pytest.raises(ValueError, match="not a Q-table file"):
+        qtable_io.read_header(str(path))
+
+    path.write_bytes(qtable_io._PREFIX.pack(qtable_io.MAGIC, qtable_io.VERSION + 1, 2) + b"{}")
+    with pytest.raises(ValueError, match="newer than"):
+        qtable_io.read_header(str(path))
+
+
+def test_legacy_json_migrates(tmp_path):
+    legacy_path, path = str(tmp_path / "q_table.json"), str(tmp_path / "q_table.qtbl")
+    q_table = np.random.default_rng(3).normal(size=(500, 6))
+    with open(legacy_path, "w") as f:
+        json.dump(q_table.tolist(), f)
+
+    assert np.array_equal(qtable_io.open_q_table(path, legacy_path, env_id="Taxi-v3"), q_table)
+    assert qtable_io.read_header(path)["env_id"] == "Taxi-v3"
+    assert qtable_io.open_q_table(str(tmp_path / "missing.qtbl"), str(tmp_path / "missing.json")) is None
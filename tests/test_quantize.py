@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import grid_trainer
+import policy
+import qtable_io
+import quantize
+import taxi_vec_env
+
+GRID_OBSTACLES = {(2, 3), (3, 3), (4, 3), (7, 1), (7, 2), (10, 10), (11, 9)}
+GRID_GOAL = (14, 14)
+
+
+@pytest.fixture(scope="module")
+def taxi_table():
+    q_table, _ = taxi_vec_env.train_q_learning(num_episodes=2000, seed=0)
+    return q_table
+
+
+@pytest.fixture(scope="module")
+def grid_table():
+    return grid_trainer.train_q_table(15, GRID_OBSTACLES, None, GRID_GOAL, episodes=300, seed=0)
+
+
+# A table built to collide under rounding: every row's runner-up sits a hair below its greedy value
+def near_tie_table(shape, seed):
+    rng = np.random.default_rng(seed)
+    q_table = rng.normal(scale=50, size=shape)
+    rows = q_table.reshape(-1, shape[-1])
+    greedy = rows.argmax(axis=1)
+    runner_up = (greedy + 1) % shape[-1]
+    rows[np.arange(len(rows)), runner_up] = rows[np.arange(len(rows)), greedy] * (1 - 1e-9) - 1e-9
+    return q_table
+
+
+def _export_all(tmp_path, q_table, obstacles):
+    source = str(tmp_path / "source.qtbl")
+    hyperparameters = {"obstacles": sorted(obstacles)} if q_table.ndim == 3 else {}
+    qtable_io.save_q_table(source, q_table, hyperparameters=hyperparameters)
+    expected = quantize.deployed_actions(q_table, obstacles)
+    for encoding in quantize.ENCODINGS:
+        path = str(tmp_path / f"{encoding}.qtbl")
+        report = quantize.export(source, path, encoding)
+        assert report["mismatches"] == 0
+        assert np.array_equal(qtable_io.load_policy(path).actions, expected), encoding
+        assert np.array_equal(quantize.deployed_actions(np.asarray(qtable_io.load_q_table(path)), obstacles),
+                              expected), encoding
+
+
+def test_taxi_exports_keep_greedy_actions(tmp_path, taxi_table):
+    _export_all(tmp_path, np.asarray(taxi_table), set())
+
+
+def test_grid_exports_keep_greedy_actions(tmp_path, grid_table):
+    _export_all(tmp_path, np.asarray(grid_table), GRID_OBSTACLES)
+
+
+@pytest.mark.parametrize("shape, obstacles", [((500, 6), set()), ((15, 15, 4), GRID_OBSTACLES)])
+def test_near_ties_keep_greedy_actions(tmp_path, shape, obstacles):
+    _export_all(tmp_path, near_tie_table(shape, seed=4), obstacles)
+
+
+def test_grid_dead_end_cells_survive_the_policy_export(tmp_path):
+    # (0, 0) is boxed in by obstacles, so it has no valid move at all
+    obstacles = {(0, 1), (1, 0)}
+    q_table = np.random.default_rng(5).normal(size=(6, 6, 4))
+    source, path = str(tmp_path / "source.qtbl"), str(tmp_path / "policy.qtbl")
+    qtable_io.save_q_table(source, q_table, hyperparameters={"obstacles": sorted(obstacles)})
+    quantize.export(source, path, "policy")
+    assert qtable_io.read_header(path)["bits"] == 3
+    assert qtable_io.load_policy(path).action((0, 0)) == policy.NO_ACTION
+
+
+def test_exports_shrink_the_table(tmp_path, taxi_table):
+    source = str(tmp_path / "source.qtbl")
+    qtable_io.save_q_table(source, np.asarray(taxi_table))
+    ratios = [quantize.export(source, str(tmp_path / f"{e}.qtbl"), e)["ratio"] for e in quantize.ENCODINGS]
+    assert ratios == sorted(ratios)
+    assert ratios[0] == 2
+
+
+def test_unknown_encoding_is_rejected(taxi_table):
+    with pytest.raises(ValueError, match="Unknown encoding"):
+        quantize.encode(taxi_table, "int4")
@@ -0,0 +1,24 @@
+import numpy as np
+
+import sweep
+
+
+def test_results_round_trip_with_a_swept_episode_count(tmp_path):
+    configs = sweep.grid_search({"num_episodes": [300, 500], "learning_rate": [0.1]})
+    path = str(tmp_path / "sweep_results.npz")
+    results = sweep.run_sweep(configs, processes=1, path=path)
+
+    summary, rewards, q_tables = sweep.load_results(path)
+    assert [r["config"] for r in summary] == [r["config"] for r in results]
+    assert [len(curve) for curve in rewards] == [r["config"]["num_episodes"] for r in results]
+    for curve, r in zip(rewards, results):
+        assert np.array_equal(curve, r["rewards"])
+    assert q_tables.shape == (2, 500, 6)
+
+
+def test_time_to_threshold():
+    rewards = np.r_[np.full(150, -10.0), np.full(150, 8.0)]
+    # The first 100-episode window averaging 7.0 holds five -10s: it starts at 145, and the count includes it
+    assert sweep.time_to_threshold(rewards, 7.0) == 145 + 100
+    assert sweep.time_to_threshold(rewards, 9.0) is None
+    assert sweep.time_to_threshold(rewards[:50], -20.0) is None
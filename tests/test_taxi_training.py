@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import checkpoint
+
+pytest.importorskip("gymnasium")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Trains in a child process; with a kill episode the child dies there abruptly, as if the machine went down
+SCRIPT = """
+import os, sys
+import gymnasium as gym
+import numpy as np
+import taxi_training
+
+kill_at, settings = int(sys.argv[1]), eval(sys.argv[2])
+env = gym.make("Taxi-v3")
+q_table = np.zeros((500, 6))
+
+def on_episode(episode, total_reward, stream):
+    if episode == kill_at:
+        os._exit(3)
+
+# Only a run that is about to be killed checkpoints every episode
+taxi_training.run_taxi_training(env, q_table, "taxi", num_episodes=400, checkpoint_interval=0 if kill_at >= 0 else 5.0,
+                                on_episode=on_episode, on_finished=lambda result: np.save("q_table.npy", q_table),
+                                **settings)
+"""
+
+
+def run(directory, kill_at=-1, settings=None):
+    return subprocess.run([sys.executable, "-c", SCRIPT, str(kill_at), repr(settings or {})], cwd=directory,
+                          env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True)
+
+
+def telemetry_bytes(directory):
+    path = os.path.join(directory, "telemetry", "taxi")
+    return {name: open(os.path.join(path, name), "rb").read() for name in sorted(os.listdir(path))}
+
+
+@pytest.mark.parametrize("settings", [{}, {"planning_steps": 5}, {"replay_batch": 32}],
+                         ids=["q_learning", "dyna", "replay"])
+def test_killed_run_resumes_to_the_same_table_and_telemetry(tmp_path, settings):
+    expected_dir, resumed_dir = tmp_path / "expected", tmp_path / "resumed"
+    expected_dir.mkdir()
+    resumed_dir.mkdir()
+    assert run(expected_dir, settings=settings).returncode == 0
+
+    assert run(resumed_dir, kill_at=150, settings=settings).returncode == 3
+    assert checkpoint.latest(str(resumed_dir / "checkpoints" / "taxi")) is not None
+    finished = run(resumed_dir, settings=settings)
+    assert finished.returncode == 0 and "Resuming from" in finished.stdout
+
+    expected, resumed = np.load(expected_dir / "q_table.npy"), np.load(resumed_dir / "q_table.npy")
+    assert resumed.tobytes() == expected.tobytes()
+    assert telemetry_bytes(resumed_dir) == telemetry_bytes(expected_dir)
+    assert checkpoint.latest(str(resumed_dir / "checkpoints" / "taxi")) is None
+
+
+def test_resume_refuses_a_checkpoint_from_another_mode(tmp_path):
+    assert run(tmp_path, kill_at=50).returncode == 3
+    refused = run(tmp_path, settings={"planning_steps": 5})
+    assert refused.returncode != 0 and "was written in mode" in refused.stderr
+    assert checkpoint.latest(str(tmp_path / "checkpoints" / "taxi")) is not None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import taxi_vec_env
+
+gym = pytest.importorskip("gymnasium")
+
+
+@pytest.fixture(scope="module")
+def taxi_v3():
+    env = gym.make("Taxi-v3").unwrapped
+    yield env
+    env.close()
+
+
+def test_transition_table_matches_taxi_v3(taxi_v3):
+    for state in range(taxi_vec_env.NUM_STATES):
+        for action in range(taxi_vec_env.NUM_ACTIONS):
+            [(probability, next_state, reward, done)] = taxi_v3.P[state][action]
+            assert probability == 1.0
+            assert taxi_vec_env.NEXT_STATE[state, action] == next_state, (state, action)
+            assert taxi_vec_env.REWARD[state, action] == reward, (state, action)
+            assert taxi_vec_env.DONE[state, action] == done, (state, action)
+
+
+def test_initial_states_match_taxi_v3(taxi_v3):
+    assert np.array_equal(taxi_vec_env.INITIAL_STATES, np.flatnonzero(taxi_v3.initial_state_distrib))
+
+
+def test_encode_decode_round_trip():
+    states = np.arange(taxi_vec_env.NUM_STATES)
+    assert np.array_equal(taxi_vec_env.encode_state(*taxi_vec_env.decode_state(states)), states)
+
+
+def test_vec_env_steps_follow_the_table():
+    env = taxi_vec_env.VecTaxiEnv(64, 50, seed=0)
+    states = env.reset()
+    actions = np.random.default_rng(0).integers(0, taxi_vec_env.NUM_ACTIONS, 64)
+    next_states, rewards, terminated, truncated = env.step(actions)
+    assert np.array_equal(next_states, taxi_vec_env.NEXT_STATE[states, actions])
+    assert np.array_equal(rewards, taxi_vec_env.REWARD[states, actions])
+    assert np.array_equal(terminated, taxi_vec_env.DONE[states, actions])
+    # Finished environments already hold a fresh start state
+    live = ~(terminated | truncated)
+    assert np.array_equal(env.states[live], next_states[live])
+    assert np.isin(env.states[~live], taxi_vec_env.INITIAL_STATES).all()
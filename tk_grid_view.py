@@ -0,0 +1,66 @@
+"""Retained Canvas grid view for the Tkinter obstacle GUI.
+
+The grid is one tk.Canvas whose cell items are created once. refresh()
+re-asks only the given cells for their content and reconfigures the items
+whose text actually changed, so a move or an obstacle toggle touches two
+cells instead of rebuilding GRID_SIZE**2 widgets. animate() runs a step
+function on the Tk event loop for autonomous multi-step runs.
+"""
+import tkinter as tk
+
+
+class GridView:
+    """A GRID_SIZE x GRID_SIZE board drawn on a single Canvas."""
+
+    def __init__(self, master, grid_size, cell_text, on_click=None, max_size=800, bg="#D0E0F0"):
+        self.grid_size = grid_size
+        self.cell_text = cell_text  # Function (x, y) -> text shown in that cell
+        self.on_click = on_click
+        self.cell_size = max(8, min(40, max_size // grid_size))
+        font_size = max(4, self.cell_size * 2 // 5)
+
+        side = self.cell_size * grid_size
+        self.canvas = tk.Canvas(master, width=side, height=side, bg=bg, highlightthickness=0)
+        self.canvas.bind("<Button-1>", self._click)
+
+        # One text item per cell, created once and reconfigured in place
+        self.items = []
+        self.texts = []
+        for x in range(grid_size):
+            cy = x * self.cell_size + self.cell_size // 2
+            row_items = []
+            for y in range(grid_size):
+                cx = y * self.cell_size + self.cell_size // 2
+                row_items.append(self.canvas.create_text(cx, cy, text="", font=("Arial", font_size)))
+            self.items.append(row_items)
+            self.texts.append([""] * grid_size)
+        self._after_id = None
+
+    def _click(self, event):
+        x, y = event.y // self.cell_size, event.x // self.cell_size
+        if self.on_click is not None and 0 <= x < self.grid_size and 0 <= y < self.grid_size:
+            self.on_click(x, y)
+
+    # Function to redraw the given cells (every cell when none are given)
+    def refresh(self, *cells):
+        if not cells:
+            cells = [(x, y) for x in range(self.grid_size) for y in range(self.grid_size)]
+        for x, y in cells:
+            text = self.cell_text((x, y))
+            if text != self.texts[x][y]:
+                self.texts[x][y] = text
+                self.canvas.itemconfigure(self.items[x][y], text=text)
+
+    # Function to call step() every interval_ms until it returns False
+    def animate(self, step, interval_ms=100):
+        self.stop_animation()
+
+        def tick():
+            self._after_id = self.canvas.after(interval_ms, tick) if step() else None
+
+        tick()
+
+    def stop_animation(self):
+        if self._after_id is not None:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None